@@ -7,11 +7,16 @@ CS3103 Group 10 - Log Analysis Script
 # Requirements : matplotlib, pandas, numpy
 
 import os
+import re
+import mmap
 import sys
 import csv
 import argparse
 import math
-from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
 
 import matplotlib
 matplotlib.use("Agg")
@@ -36,42 +41,100 @@ def _to_float_safe(v):
     except Exception:
         return None
 
-def _try_read_csv_rows(path):
-    for delim in (",", "\t", " "):
-        try:
-            with open(path, "r", newline="") as f:
-                dr = csv.DictReader(f, delimiter=delim)
-                rows = [r for r in dr]
-                if rows and any(rows[0].keys()):
-                    return rows
-        except Exception:
-            continue
+# Columns extract_series actually consumes.
+_WANT_COLS = ("event", "dir", "channel", "seq", "ts_recv_ms")
+
+def _try_read_csv_df(path):
+    # One pandas C-parser pass instead of one DictReader pass per candidate delimiter.
+    try:
+        with open(path, "r", newline="") as f:
+            sample = f.read(65536)
+        if not sample.strip():
+            return None
+        first_line = sample.split("\n", 1)[0]
+        if "," in first_line:
+            # Our own logs are comma-separated; skip the Sniffer entirely.
+            delim = ","
+        else:
+            try:
+                delim = csv.Sniffer().sniff(sample, delimiters=",\t ").delimiter
+            except csv.Error:
+                delim = ","
+        header = sample.split("\n", 1)[0].strip().split(delim)
+        if all(c in header for c in _WANT_COLS):
+            # Known GameNetAPI log schema: stream only the consumed columns,
+            # with the small string domains interned as categories.
+            df = pd.read_csv(path, sep=delim, engine="c", usecols=list(_WANT_COLS),
+                             dtype={"event": "category", "dir": "category",
+                                    "channel": "category"},
+                             na_values=["", "NA"])
+        else:
+            df = pd.read_csv(path, sep=delim, engine="c", dtype=str, na_filter=False)
+        if len(df.columns) > 1:
+            return df
+    except Exception:
+        pass
     return None
 
-def _try_read_kv_lines(path):
-    rows = []
-    with open(path, "r") as f:
-        for line in f:
-            line = line.strip()
-            if not line or line.startswith("#"):
-                continue
-            parts = line.replace("=", " ").replace(":", " ").split()
-            d = {}
-            for i in range(0, len(parts) - 1, 2):
-                k, v = parts[i].lower(), parts[i + 1]
-                d[k] = v
-            if d:
-                rows.append(d)
-    return rows if rows else None
-
-def load_text_log(path):
+# Text-log lines from tools/export_for_charts.py: "SeqNo: N ChannelType: C [RTT: Xms]"
+# Bytes-level pattern so matching runs straight over the mmapped file, no decode.
+_SEQLINE_RE = re.compile(rb"SeqNo:\s*(\d+)\s+ChannelType:\s*(\d+)(?:.*?RTT:\s*([\d.]+)\s*ms)?")
+
+def _try_read_seqline_df(path):
+    # mmap + finditer: one C-level scan over the whole file instead of a
+    # Python line loop with a search per line.
+    seqs, chans, rtts = [], [], []
+    with open(path, "rb") as f:
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # empty file
+            return None
+        with mm:
+            for m in _SEQLINE_RE.finditer(mm):
+                seqs.append(int(m.group(1)))
+                chans.append(int(m.group(2)))
+                rtts.append(float(m.group(3)) if m.group(3) else np.nan)
+    if not seqs:
+        return None
+    # Structure-of-arrays with fixed dtypes instead of per-row dicts:
+    # seq fits int32, channel int8, latency float32.
+    return pd.DataFrame({"seqno": np.array(seqs, dtype=np.int32),
+                         "channeltype": np.array(chans, dtype=np.int8),
+                         "rtt": np.array(rtts, dtype=np.float32)})
+
+def _try_read_kv_df(path):
+    # Fallback for "key value key value" / "key: value" text logs.
+    try:
+        raw = pd.read_csv(path, sep=r"[=:\s]+", engine="python", comment="#",
+                          header=None, dtype=str, skip_blank_lines=True)
+    except Exception:
+        return None
+    if raw.empty or raw.shape[1] < 2:
+        return None
+    keys = [str(k).lower() for k in raw.iloc[0, 0::2]]
+    df = raw.iloc[:, 1::2].copy()
+    df.columns = keys[:df.shape[1]]
+    return df
+
+def _coerce_numeric_cols(df):
+    # One vectorized sweep per numeric column instead of per-row float()/int().
+    if "ts_recv_ms" in df.columns:
+        df["ts_recv_ms"] = pd.to_numeric(df["ts_recv_ms"], errors="coerce")
+    if "seq" in df.columns:
+        df["seq"] = pd.to_numeric(df["seq"], errors="coerce").astype("Int64")
+    return df
+
+def load_text_log_df(path):
     if not path or not os.path.exists(path):
-        return []
-    rows = _try_read_csv_rows(path)
-    if rows:
-        return rows
-    rows = _try_read_kv_lines(path)
-    return rows or []
+        return pd.DataFrame()
+    df = _try_read_csv_df(path)
+    if df is not None:
+        return _coerce_numeric_cols(df)
+    df = _try_read_seqline_df(path)
+    if df is not None:
+        return df
+    df = _try_read_kv_df(path)
+    return _coerce_numeric_cols(df) if df is not None else pd.DataFrame()
 
 def first_present(d, keys):
     for k in keys:
@@ -86,147 +149,206 @@ def fix_timestamp_units(v):
         v = float(v)
     except Exception:
         return None
-    if v > 1e15:  
+    if v > 1e15:
         return v / 1e6
-    if v > 1e12:  
+    if v > 1e12:
         return v
-    if v > 1e9:  
+    if v > 1e9:
         return v * 1000.0
     return v
 
-def extract_series(rows):
-    send_ts_by_seq = {}
-    times_all = []
-
-    for idx, r in enumerate(rows):
-        t = fix_timestamp_units(r.get("ts_recv_ms"))
-        if t is not None:
-            times_all.append(t)
-
-        ev  = (r.get("event") or "").lower()
-        dir_ = (r.get("dir") or "").upper()
-        ch  = (r.get("channel") or "").upper()
-
-        s = r.get("seq")
-        try:
-            s = int(float(s)) if s not in (None, "", "NA") else None
-        except Exception:
-            s = None
+def detect_scale(sample):
+    # Unit scale is constant within one log file; decide it once.
+    m = float(sample)
+    if m > 1e15:
+        return 1e-6   # ns -> ms
+    if m > 1e12:
+        return 1.0    # already ms (epoch ms)
+    if m > 1e9:
+        return 1000.0  # s -> ms
+    return 1.0
+
+def fix_timestamp_units_vec(col):
+    # Vector form of fix_timestamp_units: sniff the scale from the first
+    # valid sample and apply one multiply over the whole column.
+    v = np.asarray(pd.to_numeric(col, errors="coerce"), dtype=float)
+    valid = v[~np.isnan(v)]
+    if valid.size == 0:
+        return v
+    scale = detect_scale(valid[0])
+    return v if scale == 1.0 else v * scale
+
+def _str_col(df, name, case):
+    # Column as a cleaned string array ("" when absent); case is str.lower/str.upper.
+    if name not in df.columns:
+        return pd.Series("", index=df.index, dtype=str)
+    s = df[name].astype(str).str.strip()
+    return s.str.lower() if case == "lower" else s.str.upper()
+
+def extract_series(df):
+    empty = {"seq_lat": np.array([], dtype=np.int64),
+             "lat": np.array([], dtype=float),
+             "time_all": np.array([], dtype=float)}
+    if df.empty or "ts_recv_ms" not in df.columns:
+        log("[info] matched ACKs with SENDs: 0 (missed 0)")
+        return empty
+
+    ts = pd.Series(fix_timestamp_units_vec(df["ts_recv_ms"]), index=df.index)
+    seq = pd.to_numeric(df.get("seq"), errors="coerce") if "seq" in df.columns else pd.Series(np.nan, index=df.index)
+
+    ev = _str_col(df, "event", "lower").to_numpy()
+    dir_ = _str_col(df, "dir", "upper").to_numpy()
+    ch = _str_col(df, "channel", "upper").to_numpy()
+
+    times_all = ts.to_numpy(dtype=float)
+    times_all = times_all[~np.isnan(times_all)]
+
+    send_mask = (ev == "send") & (dir_ == "TX") & (ch == "REL") & seq.notna().to_numpy() & ts.notna().to_numpy()
+    # First SEND per seq wins (retransmits keep the original timestamp).
+    send_ts = pd.Series(ts.to_numpy()[send_mask], index=seq.to_numpy()[send_mask].astype(np.int64))
+    send_ts = send_ts[~send_ts.index.duplicated(keep="first")]
+
+    ack_mask = (ev == "ack") & seq.notna().to_numpy()
+    ack_seq = seq.to_numpy()[ack_mask].astype(np.int64)
+    ack_ts = ts.to_numpy()[ack_mask]
+
+    rtt = ack_ts - send_ts.reindex(ack_seq).to_numpy(dtype=float)
+    valid = ~np.isnan(rtt) & (rtt >= 0) & (rtt <= 5000)
+    seqs_lat = ack_seq[valid]
+    lat_vals = rtt[valid]
+    missed = int(ack_seq.size - seqs_lat.size)
 
-        if ev == "send" and dir_ == "TX" and ch == "REL" and s is not None and t is not None:
-            if s not in send_ts_by_seq:  
-                send_ts_by_seq[s] = t
+    log(f"[info] matched ACKs with SENDs: {len(seqs_lat)} (missed {missed})")
+    return {"seq_lat": seqs_lat, "lat": lat_vals, "time_all": times_all}
 
-    seqs_lat, lat_vals = [], []
-    missed = 0
-    for r in rows:
-        if (r.get("event") or "").lower() != "ack":
-            continue
+# plot helpers
+# Charts are rendered into their own figures and queued; flush_saves() then
+# writes all PNGs on a thread pool (Agg's png compression releases the GIL,
+# so the writes overlap).
+_PENDING_SAVES = []
 
-        s = r.get("seq")
-        try:
-            s = int(float(s)) if s not in (None, "", "NA") else None
-        except Exception:
-            s = None
-        if s is None:
-            continue
-
-        t_ack  = fix_timestamp_units(r.get("ts_recv_ms"))
-        t_send = send_ts_by_seq.get(s)
-
-        if t_ack is None or t_send is None:
-            missed += 1
-            continue
-
-        rtt = t_ack - t_send
-        if 0 <= rtt <= 5000:  
-            seqs_lat.append(s)
-            lat_vals.append(rtt)
-        else:
-            missed += 1
+def _queue_save(fig, fname):
+    _PENDING_SAVES.append((fig, os.path.join(PLOTS_DIR, fname)))
 
-    log(f"[info] matched ACKs with SENDs: {len(seqs_lat)} (missed {missed})")
-    return {"seq_lat": seqs_lat, "lat": lat_vals, "time_all": times_all}
+def flush_saves():
+    if not _PENDING_SAVES:
+        return
+    def _save(pair):
+        fig, out = pair
+        fig.savefig(out, dpi=160)
+        return out
+    with ThreadPoolExecutor(max_workers=4) as ex:
+        for out in ex.map(_save, _PENDING_SAVES):
+            log(f"[ok] saved {out}")
+    for fig, _ in _PENDING_SAVES:
+        plt.close(fig)
+    _PENDING_SAVES.clear()
+
+def _downsample(x, y, n=4000):
+    # Min-max bucket downsampling for plotting only: keeps each bucket's
+    # extremes so spikes stay visible while Agg renders far fewer segments.
+    y = np.asarray(y)
+    x = np.asarray(x)
+    if y.size <= n:
+        return x, y
+    keep = []
+    for c in np.array_split(np.arange(y.size), n // 2):
+        seg = y[c]
+        keep.append(c[seg.argmin()])
+        keep.append(c[seg.argmax()])
+    keep = np.unique(np.array(keep))
+    return x[keep], y[keep]
 
-# plot helpers 
 def save_line(y, x=None, title="", ylabel="", xlabel="", fname="plot.png"):
     if x is None:
         x = range(len(y))
-    if not y:
+    if len(y) == 0:
         log(f"[skip] {fname}: no data")
         return
     try:
-        plt.figure()
-        plt.plot(x, y)
-        plt.title(title)
-        plt.xlabel(xlabel)
-        plt.ylabel(ylabel)
-        out = os.path.join(PLOTS_DIR, fname)
-        plt.tight_layout()
-        plt.savefig(out, dpi=160)
-        plt.close()
-        log(f"[ok] saved {out}")
+        x, y = _downsample(x, y)
+        fig, ax = plt.subplots(figsize=(8, 5))
+        ax.plot(x, y)
+        ax.set_title(title)
+        ax.set_xlabel(xlabel)
+        ax.set_ylabel(ylabel)
+        fig.tight_layout()
+        _queue_save(fig, fname)
     except Exception as e:
         log(f"[err] {fname}: {e}")
 
 def save_throughput(times_ms, window_s=1.0, fname="throughput.png"):
-    t = [fix_timestamp_units(v) for v in times_ms if v is not None]
-    t = [float(v) for v in t if v is not None and not math.isnan(v)]
+    # times_ms is the already unit-normalized, NaN-free float64 array from
+    # extract_series; don't re-run the unit fix over it.
+    t = np.asarray(times_ms, dtype=float)
     if len(t) < 2:
         log(f"[skip] {fname}: not enough timestamps")
         return
-    t0 = min(t)
-    t = [(v - t0) / 1000.0 for v in t]  
-    tmax = max(t)
-    bins = max(1, int(math.ceil(tmax / window_s)))
-    counts = [0] * bins
-    for v in t:
-        idx = min(bins - 1, int(v // window_s))
-        counts[idx] += 1
-    centers = [(i + 0.5) * window_s for i in range(bins)]
+    t_rel = (t - t.min()) / 1000.0
+    bins = max(1, int(math.ceil(t_rel.max() / window_s)))
+    idx = np.minimum((t_rel // window_s).astype(np.int64), bins - 1)
+    counts = np.bincount(idx, minlength=bins)
+    centers = (np.arange(bins) + 0.5) * window_s
     save_line(counts, centers,
               title="Throughput (pkts/s)",
               ylabel="pkts/s", xlabel="time (s)",
               fname=fname)
 
-def jitter_rfc3550(lat_ms):
-    if len(lat_ms) < 2:
-        return []
-    J_series = []
+def _jitter_rfc3550_kernel(a):
+    # Serial recurrence J += (|D| - J)/16; not vectorizable, so keep it a
+    # tight scalar loop that Numba can compile when available.
+    out = np.empty(a.size - 1)
     J = 0.0
-    prev = lat_ms[0]
-    for i in range(1, len(lat_ms)):
-        D = abs(lat_ms[i] - prev)
+    prev = a[0]
+    for i in range(1, a.size):
+        D = abs(a[i] - prev)
         J += (D - J) / 16.0
-        J_series.append(J)
-        prev = lat_ms[i]
-    return J_series
+        out[i - 1] = J
+        prev = a[i]
+    return out
+
+try:
+    from numba import njit
+    _jitter_rfc3550_kernel = njit(cache=True, fastmath=True)(_jitter_rfc3550_kernel)
+except ImportError:
+    pass
+
+def jitter_rfc3550(lat_ms):
+    a = np.asarray(lat_ms, dtype=float)
+    if a.size < 2:
+        return np.array([], dtype=float)
+    return _jitter_rfc3550_kernel(a)
 
 def save_dual_line(y1, x1, y2, x2, label1, label2,
                    title="", ylabel="", xlabel="", fname="plot.png"):
-    if not y1 and not y2:
+    if len(y1) == 0 and len(y2) == 0:
         log(f"[skip] {fname}: no data"); return
     if x1 is None: x1 = range(len(y1))
     if x2 is None: x2 = range(len(y2))
-    plt.figure()
-    if y1: plt.plot(x1, y1, label=label1)
-    if y2: plt.plot(x2, y2, label=label2)
-    plt.title(title); plt.xlabel(xlabel); plt.ylabel(ylabel)
-    plt.legend()
-    out = os.path.join(PLOTS_DIR, fname)
-    plt.tight_layout(); plt.savefig(out, dpi=160); plt.close()
-    log(f"[ok] saved {out}")
+    fig, ax = plt.subplots(figsize=(8, 5))
+    if len(y1):
+        x1, y1 = _downsample(x1, y1)
+        ax.plot(x1, y1, label=label1)
+    if len(y2):
+        x2, y2 = _downsample(x2, y2)
+        ax.plot(x2, y2, label=label2)
+    ax.set_title(title); ax.set_xlabel(xlabel); ax.set_ylabel(ylabel)
+    ax.legend()
+    fig.tight_layout()
+    _queue_save(fig, fname)
 
 
 def describe_stats(name, vals):
-    if not vals:
+    if len(vals) == 0:
         log(f"[stats] {name}: no samples")
         return
-    import numpy as np
-    a = np.array(vals, dtype=float)
-    p95 = float(np.percentile(a, 95))
+    a = np.asarray(vals, dtype=float)  # no copy when already float64
+    k = min(int(0.95 * a.size), a.size - 1)
+    p95 = float(np.partition(a, k)[k])  # O(N) selection vs full sort
+    jit = float(np.abs(np.diff(a)).mean()) if a.size > 1 else 0.0
     msg = (f"[stats] {name}: count={len(a)}  mean={a.mean():.3f} ms  "
-           f"median={np.median(a):.3f} ms  p95={p95:.3f} ms  max={a.max():.3f} ms")
+           f"median={np.median(a):.3f} ms  p95={p95:.3f} ms  max={a.max():.3f} ms  "
+           f"jitter={jit:.3f} ms")
     log(msg)
 
 def main():
@@ -242,13 +364,13 @@ def main():
     compare_mode = bool(args.sender_a and args.sender_b)
 
     if compare_mode:
-        rowsA = load_text_log(args.sender_a)
-        rowsB = load_text_log(args.sender_b)
-        if not rowsA and not rowsB:
+        dfA = load_text_log_df(args.sender_a)
+        dfB = load_text_log_df(args.sender_b)
+        if dfA.empty and dfB.empty:
             log("[err] No logs for A or B."); sys.exit(1)
 
-        dataA = extract_series(rowsA)
-        dataB = extract_series(rowsB)
+        dataA = extract_series(dfA)
+        dataB = extract_series(dfB)
 
         # latency
         save_dual_line(
@@ -275,22 +397,23 @@ def main():
         save_throughput(dataA["time_all"], fname="throughput_A.png")
         save_throughput(dataB["time_all"], fname="throughput_B.png")
 
+        flush_saves()
         log("[done] compare charts saved in 'plots/'")
         return
 
     sender_path = args.sender or "sender.txt"
-    sender_rows = load_text_log(sender_path)
-    receiver_rows = load_text_log(args.receiver)
+    sender_df = load_text_log_df(sender_path)
+    receiver_df = load_text_log_df(args.receiver)
 
-    if not sender_rows and not receiver_rows:
+    if sender_df.empty and receiver_df.empty:
         log("[err] No logs found. Use --sender path."); sys.exit(1)
-    if not sender_rows:
+    if sender_df.empty:
         log("[warn] sender log empty; using receiver (might have no RTT).")
-    if not receiver_rows:
+    if receiver_df.empty:
         log("[warn] receiver log empty; using sender only (normal for now).")
 
-    base_rows = sender_rows if sender_rows else receiver_rows
-    data = extract_series(base_rows)
+    base_df = sender_df if not sender_df.empty else receiver_df
+    data = extract_series(base_df)
 
     save_line(data["lat"], data["seq_lat"],
               title="Latency per packet", ylabel="ms", xlabel="packet index",
@@ -299,6 +422,7 @@ def main():
     save_line(J, title="Jitter (RFC3550 estimator)", ylabel="ms",
               xlabel="packet index", fname="jitter.png")
     save_throughput(data["time_all"], window_s=1.0, fname="throughput.png")
+    flush_saves()
     log("[done] charts saved in 'plots/'")
 
 if __name__ == "__main__":
@@ -5,6 +5,9 @@ CS3103 Group 10 - GameNetAPI
 H-UDP with reliable/unreliable channels
 
 """
+import os
+import queue
+import selectors
 import socket
 import threading
 import struct
@@ -12,7 +15,8 @@ from typing import Callable, Optional, Tuple
 
 from header import (
     CHAN_RELIABLE, CHAN_UNRELIABLE, CHAN_ACK,
-    pack_header, unpack_header, now_ms
+    HEADER_SIZE, HEADER_STRUCT,
+    unpack_header, now_ms
 )
 
 from logger import Logger
@@ -21,6 +25,44 @@ from reliable import (
     ReliableReceiver,
 )
 
+import netbatch
+
+# Whole ACK frame (header + echoed uint32 timestamp) in one pack_into;
+# and the payload view for the RX side.
+_ACK_STRUCT = struct.Struct("!BHII")
+_ACK_PAYLOAD = struct.Struct("!I")
+
+
+def _dynamic_t_kernel(srtt: float, rttvar: float, k: float,
+                      u: float, tmin: float, tmax: float) -> float:
+    # Pure-float adaptive-t math; shaped so numba can compile it when
+    # present (the replay/stress paths call this millions of times).
+    est = srtt + k * rttvar + u
+    if est < tmin:
+        est = tmin
+    elif est > tmax:
+        est = tmax
+    return est
+
+
+def _ewma_kernel(srtt: float, rttvar: float, x: float) -> Tuple[float, float]:
+    # RFC 6298 order (rttvar first) with the tcp_input.c reduced gain.
+    err = srtt - x
+    abserr = err if err >= 0 else -err
+    if x < srtt - rttvar:
+        rttvar = 0.96875 * rttvar + 0.03125 * abserr  # 31/32, 1/32
+    else:
+        rttvar = 0.75 * rttvar + 0.25 * abserr        # 3/4, 1/4
+    return srtt + 0.125 * (x - srtt), rttvar
+
+
+try:  # optional JIT; pure-Python fallbacks are the same functions
+    from numba import njit as _njit
+    _dynamic_t_kernel = _njit(cache=True)(_dynamic_t_kernel)
+    _ewma_kernel = _njit(cache=True)(_ewma_kernel)
+except Exception:
+    pass
+
 
 class GameNetAPI:
     # Reliable/unreliable send, demux, and logging 
@@ -40,14 +82,43 @@ class GameNetAPI:
         max_urgency_ms: int = 50,             # cap for urgency hint
         srtt: Optional[float] = None,
         rttvar: Optional[float] = None,
+        reuseport: bool = False,
+        sock_buf_bytes: int = 4 * 1024 * 1024,
+        connect: bool = False,
     ):
         self.t_mode = str(t_mode)
         self.t_static_ms = int(t_static_ms)
-        self.verbose = verbose  
+        self.verbose = verbose
         self.sock = sock
         self.peer = peer  # must be set for sending & ACKs
+        # connect=True: connect() the UDP socket in set_peer so the kernel
+        # caches the route, filters foreign sources, and sends skip the
+        # per-packet sockaddr copy. Sender-side option; receivers that
+        # learn the peer lazily keep the unconnected default.
+        self._want_connect = bool(connect)
+        self._connected = False
         self.max_recv_size = max_recv_size
 
+        # Kernel buffer tuning: defaults overflow under bursts, which drops
+        # reliable packets and inflates srtt/rttvar via retransmits. The
+        # kernel clamps to net.core.{r,w}mem_max, so just ask and read back.
+        if sock_buf_bytes:
+            try:
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, int(sock_buf_bytes))
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, int(sock_buf_bytes))
+            except OSError:
+                pass
+        if reuseport and hasattr(socket, "SO_REUSEPORT"):
+            try:
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+            except OSError:
+                pass
+        try:
+            self._rcvbuf = sock.getsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF)
+            self._sndbuf = sock.getsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF)
+        except OSError:
+            self._rcvbuf = self._sndbuf = 0
+
         # callbacks
         self.onReliable: Optional[Callable[[bytes], None]] = None
         self.onUnreliable: Optional[Callable[[bytes], None]] = None
@@ -70,7 +141,16 @@ class GameNetAPI:
         self.max_urgency_ms = int(max_urgency_ms)
         self.srtt = srtt
         self.rttvar = rttvar
+        # static-mode deadline is a constant; clamp it once up front
+        self._t_static_cached = max(self.t_min_ms, min(self.t_max_ms, self.t_static_ms))
         
+        # reusable TX buffer for the unreliable fast path (header packed in place)
+        self._txbuf = bytearray(HEADER_SIZE + max_recv_size)
+        self._txmv = memoryview(self._txbuf)
+        self._hdr_mv = self._txmv[:HEADER_SIZE]  # scatter-gather header view
+        # reusable 11-byte ACK frame (RX thread only)
+        self._ack_buf = bytearray(_ACK_STRUCT.size)
+
         # channels (defer ReliableSender until peer is known)
         self.reliable_sender = None
         # receiver is fine to construct now
@@ -95,14 +175,31 @@ class GameNetAPI:
 
         # control
         self._rx_thread = threading.Thread(target=self._rx_loop, daemon=True)
+        # data packets are handed to a dispatcher thread so slow app
+        # callbacks never stall socket draining (ACKs stay on the RX thread)
+        self._rx_q: "queue.SimpleQueue" = queue.SimpleQueue()
+        self._dispatch_thread = threading.Thread(target=self._dispatch_loop, daemon=True)
+        # self-pipe so stop() can wake the RX selector immediately
+        self._stop_r, self._stop_w = os.pipe()
         self._running = False
 
+        # specialize-on-state: send raises until a peer is known, then is
+        # rebound to the real implementation (no per-send peer check)
+        self.send = self._send_with_peer if self.peer else self._send_no_peer
+
         # counters
         self._rx_rel = 0
         self._rx_unrel = 0
         self._tx_rel = 0
         self._tx_unrel = 0
         self._rx_ack = 0
+
+        # channel demux table, built once (swap entries to disable a channel)
+        self._chan_handlers = {
+            CHAN_RELIABLE: self._on_rel_packet,
+            CHAN_UNRELIABLE: self._on_unrel_packet,
+            CHAN_ACK: self._on_ack_packet,
+        }
     
     # ---------------- RTT update (single source, public facing) ----------------
     # EWMA update owned here (called when an ACK sample arrives)
@@ -111,15 +208,13 @@ class GameNetAPI:
 
         if sample_ms < 1.0:
             x = 1.0  # clamp very low samples
-            
-        alpha, beta = 0.125, 0.25 # 1/8 and 1/4
-        if self.srtt is None or self.rttvar is None:
+
+        s = self.srtt
+        if s is None or self.rttvar is None:
             self.srtt = x
-            self.rttvar = x / 2.0
+            self.rttvar = x * 0.5
         else:
-            err = x - self.srtt
-            self.srtt += alpha * err
-            self.rttvar = (1.0 - beta) * self.rttvar + beta * abs(err)
+            self.srtt, self.rttvar = _ewma_kernel(s, self.rttvar, x)
         if self.verbose:
             print(f"[RTT/update] sample={x:.1f}ms srtt={self.srtt:.1f} rttvar={self.rttvar:.1f}")
 
@@ -142,14 +237,27 @@ class GameNetAPI:
         self.onUnreliable = unreliable_cb
         self.onAck = ack_cb
 
+    def set_t_static(self, ms: int) -> None:
+        # Change the static-mode deadline; keeps the cached clamp in sync.
+        self.t_static_ms = int(ms)
+        self._t_static_cached = max(self.t_min_ms, min(self.t_max_ms, self.t_static_ms))
+
     def set_peer(self, peer: Tuple[str,int]) -> None:
         # Explicitly set the remote peer (used for send & ACK).
         self.peer = peer
+        self.send = self._send_with_peer
+        if self._want_connect and not self._connected:
+            try:
+                self.sock.connect(peer)
+                self._connected = True
+            except OSError:
+                pass  # stay unconnected; sendto path still works
         if self.peer and self.reliable_sender is None:
             self.reliable_sender = ReliableSender(
                 self.sock, self.peer, self.get_rto_ms, # ReliableSender must accept get_rto_ms
                 log_retx_cb=self._log_tx_retransmit,
-                log_expire_cb=self._log_tx_expire
+                log_expire_cb=self._log_tx_expire,
+                connected=self._connected
             )
 
     def start(self) -> None:
@@ -158,21 +266,36 @@ class GameNetAPI:
             self.reliable_sender = ReliableSender(
                 self.sock, self.peer, self.get_rto_ms, # ReliableSender must accept get_rto_ms
                 log_retx_cb=self._log_tx_retransmit,
-                log_expire_cb=self._log_tx_expire
+                log_expire_cb=self._log_tx_expire,
+                connected=self._connected
             )
         if self.reliable_sender:
             self.reliable_sender.start()
         self._running = True
+        self._dispatch_thread.start()
         self._rx_thread.start()
 
     def stop(self) -> None:
         self._running = False
+        try:
+            os.write(self._stop_w, b"x")  # wake the RX selector
+        except OSError:
+            pass
+        if self._rx_thread.is_alive():
+            self._rx_thread.join(timeout=1.0)
+        self._rx_q.put(None)  # wake the dispatcher so it can exit
+        if self._dispatch_thread.is_alive():
+            self._dispatch_thread.join(timeout=1.0)
         if self.reliable_sender:
             self.reliable_sender.stop()
         if self.logger:
             self.logger.close()
 
-    def send(self, payload: bytes, reliable: bool = True, urgency_ms: int = 0) -> None:
+    def _send_no_peer(self, payload: bytes, reliable: bool = True, urgency_ms: int = 0) -> None:
+        # `send` points here until a peer is known (see set_peer).
+        raise RuntimeError("Peer not set. Call set_peer((host,port)) or pass peer in GameNetAPI().")
+
+    def _send_with_peer(self, payload: bytes, reliable: bool = True, urgency_ms: int = 0) -> None:
         """
         Send a payload on the chosen channel. Peer must be set first.
 
@@ -180,23 +303,24 @@ class GameNetAPI:
         reliable: True for reliable channel; False for unreliable
         urgency_ms: small positive hint to increase deadline (0-50ms typical)
         """
-        assert self.peer is not None, "Peer not set. Call set_peer((host,port)) or pass peer in GameNetAPI()."
+        # No peer check here: `send` is only rebound to this method once
+        # a peer is set, so the per-send assert is gone.
         if reliable:
             if self.reliable_sender is None:
                 self.reliable_sender = ReliableSender(
                     self.sock, self.peer, self.get_rto_ms, # ReliableSender must accept get_rto_ms
                     log_retx_cb=self._log_tx_retransmit,
-                    log_expire_cb=self._log_tx_expire
+                    log_expire_cb=self._log_tx_expire,
+                    connected=self._connected
                 )
                 self.reliable_sender.start()
         
-            # compute per-packet deadline 't' based on mode (for EVERY send)
-            try:
-                t = self._compute_dynamic_t(urgency_ms) if self.t_mode == "dynamic" else self.t_static_ms
-            except Exception:
-                t = int(self._compute_dynamic_t(urgency_ms))
-            # defensive clamp
-            t = max(self.t_min_ms, min(self.t_max_ms, t))
+            # per-packet deadline 't': static mode reuses the pre-clamped
+            # constant, dynamic mode clamps inside _compute_dynamic_t
+            if self.t_mode == "static":
+                t = self._t_static_cached
+            else:
+                t = self._compute_dynamic_t(urgency_ms)
 
             # Pass deadline to sender
             seq = self.reliable_sender.send(
@@ -217,13 +341,20 @@ class GameNetAPI:
 
             self._tx_rel += 1
             if self.logger:
-                self.logger.write([now_ms(), "TX", "REL", seq, now_ms(), "", 0, "send", t, len(payload)])
+                now = now_ms()
+                self.logger.write_csv(f"{now},TX,REL,{seq},{now},,0,send,{t},{len(payload)}\n")
         else:
-            pkt = pack_header(CHAN_UNRELIABLE, 0, now_ms()) + payload
-            self.sock.sendto(pkt, self.peer)
+            now = now_ms()  # one clock read per send; reused for log row
+            # scatter-gather: header packed in place, payload handed to the
+            # kernel as a second iovec — no Python-side concat or memcpy
+            HEADER_STRUCT.pack_into(self._txbuf, 0, CHAN_UNRELIABLE, 0, now & 0xFFFFFFFF)
+            if self._connected:
+                self.sock.sendmsg((self._hdr_mv, payload))
+            else:
+                self.sock.sendmsg((self._hdr_mv, payload), (), 0, self.peer)
             self._tx_unrel += 1
             if self.logger:
-                self.logger.write([now_ms(), "TX", "UNREL", "", now_ms(), "", 0, "send", "", len(payload)])
+                self.logger.write_csv(f"{now},TX,UNREL,,{now},,0,send,,{len(payload)}\n")
 
     def stats(self) -> dict:
         return {
@@ -237,17 +368,13 @@ class GameNetAPI:
             "t_min_ms": self.t_min_ms, # expose for debugging
             "t_max_ms": self.t_max_ms, # expose for debugging
             "k_rttvar": self.k_rttvar,
+            "so_rcvbuf": self._rcvbuf,
+            "so_sndbuf": self._sndbuf,
         }
 
     def update(self, sample_ms: float):
-        if self.srtt is None:
-            self.srtt = float(sample_ms)
-            self.rttvar = self.srtt / 2.0
-            return
-        alpha, beta = 0.125, 0.25
-        err = float(sample_ms) - self.srtt
-        self.srtt += alpha * err
-        self.rttvar = (1 - beta) * self.rttvar + beta * abs(err)
+        # Legacy alias; single source of truth is update_rtt().
+        self.update_rtt(sample_ms)
 
     # ---------------- Internal ----------------
 
@@ -262,22 +389,18 @@ class GameNetAPI:
         - Fallback when we don't have SRTT yet: assume the default base (200ms) and rttvar ~ base/2.
         """
         # Pull current estimates
-        if self.srtt is None or self.rttvar is None:
-            return int(200)
-        else:
-            srtt = self.srtt
-            rttvar = self.rttvar
-
-        #if srtt is None or rttvar is None:
-        #    srtt, rttvar = 200.0, 100.0 # use defaults at the start
+        srtt = self.srtt
+        rttvar = self.rttvar
+        if srtt is None or rttvar is None:
+            return 200
 
-        k = self.k_rttvar
         u = max(0, min(int(urgency_ms), self.max_urgency_ms))
 
-        # from formula 
-        t = float(srtt) + k * float(rttvar) + float(u)
-        t = max(self.t_min_ms, min(t, self.t_max_ms))
-        return int(t)
+        # from formula (clamped inside the kernel)
+        return int(_dynamic_t_kernel(
+            float(srtt), float(rttvar), self.k_rttvar,
+            float(u), float(self.t_min_ms), float(self.t_max_ms),
+        ))
 
     def _deliver_reliable(self, app_payload: bytes) -> None:
         if self.onReliable:
@@ -292,78 +415,171 @@ class GameNetAPI:
         return struct.pack("!I", echo_ts_ms & 0xFFFFFFFF)
 
     def _send_ack(self, seq: int, echo_ts_ms: int) -> None:
-        # Ack is ChannelType=2 with payload=echo_ts (uint32)
+        # Ack is ChannelType=2 with payload=echo_ts (uint32).
+        # One pack_into on a persistent buffer: no concat, no temporaries.
         assert self.peer is not None, "Peer not set, cannot send ACK"
-        pkt = pack_header(CHAN_ACK, seq, now_ms()) + self.pack_ack(seq, echo_ts_ms)
-        self.sock.sendto(pkt, self.peer)
+        _ACK_STRUCT.pack_into(
+            self._ack_buf, 0,
+            CHAN_ACK, seq & 0xFFFF, now_ms() & 0xFFFFFFFF, echo_ts_ms & 0xFFFFFFFF,
+        )
+        if self._connected:
+            self.sock.send(self._ack_buf)
+        else:
+            self.sock.sendto(self._ack_buf, self.peer)
 
     def _rx_loop(self) -> None:
-        self.sock.settimeout(0.2)
-        while self._running:
-            try:
-                data, _addr = self.sock.recvfrom(self.max_recv_size)
-                if self.peer is None:
-                    # learn peer lazily on first packet (receiver side)
-                    self.peer = _addr
-            except socket.timeout:
-                continue
-            except OSError:
-                break  # socket closed during stop()
-
-            # Parse header
-            try:
-                chan, seq, ts, payload = unpack_header(data)
-            except Exception:
-                continue
+        # Event-driven RX: non-blocking socket on an epoll/kqueue selector,
+        # woken either by readable data or by the stop pipe. No periodic
+        # timeout wakeups, and stop() takes effect immediately.
+        self.sock.setblocking(False)
+        sel = selectors.DefaultSelector()
+        sel.register(self.sock, selectors.EVENT_READ)
+        sel.register(self._stop_r, selectors.EVENT_READ)
+        # recvmmsg batch (Linux): drain many datagrams per syscall.
+        batch = netbatch.RxBatch(32, self.max_recv_size) if netbatch.available() else None
+        fd = self.sock.fileno()
+        # hoist per-iteration attribute lookups out of the hot loop
+        select = sel.select
+        stop_r = self._stop_r
+        handle = self._handle_packet
+        batch_recv = batch.recv if batch is not None else None
+        # fallback path: one preallocated RX buffer, header parsed in
+        # place and only the payload materialized as bytes
+        rxbuf = bytearray(self.max_recv_size)
+        rxmv = memoryview(rxbuf)
+        recvfrom_into = self.sock.recvfrom_into
+        handle_buf = self._handle_buffer
+        try:
+            while self._running:
+                for key, _ in select(timeout=None):
+                    if key.fd == stop_r:
+                        os.read(stop_r, 64)
+                        return
+                    if batch_recv is not None:
+                        try:
+                            pkts = batch_recv(fd)
+                        except OSError:
+                            return  # socket closed during stop()
+                        while pkts:
+                            for data, _addr in pkts:
+                                handle(data, _addr)
+                            try:
+                                pkts = batch_recv(fd)
+                            except OSError:
+                                return
+                    else:
+                        while True:
+                            try:
+                                n, _addr = recvfrom_into(rxbuf)
+                            except (BlockingIOError, InterruptedError):
+                                break
+                            except OSError:
+                                return  # socket closed during stop()
+                            handle_buf(rxmv, n, _addr)
+        finally:
+            sel.close()
+
+    def _handle_packet(self, data: bytes, _addr: Tuple[str, int]) -> None:
+        if self.peer is None:
+            # learn peer lazily on first packet (receiver side)
+            self.peer = _addr
+            self.send = self._send_with_peer
+
+        # Parse header
+        try:
+            chan, seq, ts, payload = unpack_header(data)
+        except Exception:
+            return
 
+        # dict-of-callables dispatch: one lookup instead of the if/elif
+        # chain; unknown channels fall through to None and are ignored
+        handler = self._chan_handlers.get(chan)
+        if handler is not None:
+            handler(seq, ts, payload)
+
+    def _handle_buffer(self, mv: memoryview, n: int, _addr: Tuple[str, int]) -> None:
+        # recvfrom_into variant: the packet sits in a reused buffer, so
+        # parse the header in place and copy out only the payload (it
+        # outlives this call once handed to the dispatcher).
+        if self.peer is None:
+            # learn peer lazily on first packet (receiver side)
+            self.peer = _addr
+            self.send = self._send_with_peer
+
+        if n < HEADER_SIZE:
+            return
+        chan, seq, ts = HEADER_STRUCT.unpack_from(mv)
+        handler = self._chan_handlers.get(chan)
+        if handler is not None:
+            handler(seq, ts, bytes(mv[HEADER_SIZE:n]))
+
+    # Per-channel handlers: REL and UNREL hand off to the dispatcher
+    # thread (app callbacks must not block the socket drain); ACKs are
+    # processed inline to keep RTT samples jitter-free.
+    def _on_rel_packet(self, seq: int, ts: int, payload: bytes) -> None:
+        self._rx_q.put((CHAN_RELIABLE, seq, ts, payload))
+
+    def _on_unrel_packet(self, seq: int, ts: int, payload: bytes) -> None:
+        self._rx_q.put((CHAN_UNRELIABLE, seq, ts, payload))
+
+    def _on_ack_packet(self, seq: int, ts: int, payload: bytes) -> None:
+        self._rx_ack += 1
+
+        # Only meaningful for the sender side
+        if self.reliable_sender is not None:
+            # Payload carries echoed original send timestamp (uint32)
+            echo_ts = _ACK_PAYLOAD.unpack_from(payload)[0]
+            now = now_ms()  # single clock read for RTT diff and log row
+            now32 = now & 0xFFFFFFFF
+            diff = (now32 - (echo_ts & 0xFFFFFFFF)) & 0xFFFFFFFF
+            rtt_ms = float(diff)
+
+            retries = self.reliable_sender.on_ack(seq, echo_ts)
+            # Karn's rule: a retransmitted packet's ACK is ambiguous
+            # (it may answer either transmission), so don't feed it
+            # into SRTT/RTTVAR. None means the seq wasn't inflight -
+            # a duplicate ACK for an already-acked (possibly
+            # retransmitted) packet - which is just as ambiguous, so
+            # only retries == 0 samples count. Also drop wrap/skew
+            # outliers: a real sample never exceeds a few seconds on
+            # these links.
+            if diff <= 5_000 and retries == 0:
+                try:
+                    self.update_rtt(rtt_ms)
+                except Exception:
+                    pass
+            if self.logger:
+                self.logger.write_csv(
+                    f"{now},RX,ACK,{seq},{echo_ts},{rtt_ms},,ack,,{len(payload)}\n"
+                )
+            if self.onAck:
+                self.onAck(seq, rtt_ms)
+
+    def _dispatch_loop(self) -> None:
+        # Drain parsed data packets and run app-facing delivery.
+        while True:
+            item = self._rx_q.get()
+            if item is None:
+                break
+            chan, seq, ts, payload = item
             now = now_ms()
-
             if chan == CHAN_RELIABLE:
                 self._rx_rel += 1
                 if self.logger:
-                    self.logger.write([now, "RX", "REL", seq, ts, "", "", "recv", "", len(payload)])
+                    self.logger.write_csv(f"{now},RX,REL,{seq},{ts},,,recv,,{len(payload)}\n")
                 # Demux to reliable receiver (handles reorder + skip-after-t)
                 self.reliable_receiver.on_packet(seq, ts, payload)
-                # The receiver will enforce skip-after-t using its own gap timer. If added gap_deadline_fn in ReliableReceiver, 
-                # it calls _compute_deadline_ms() internally but otherwise it uses default.
-
-            elif chan == CHAN_UNRELIABLE:
+            else:  # CHAN_UNRELIABLE
                 self._rx_unrel += 1
                 if self.logger:
-                    self.logger.write([now, "RX", "UNREL", "", ts, "", "", "recv", "", len(payload)])
+                    self.logger.write_csv(f"{now},RX,UNREL,,{ts},,,recv,,{len(payload)}\n")
                 if self.onUnreliable:
                     self.onUnreliable(payload)
 
-            elif chan == CHAN_ACK:
-                self._rx_ack += 1
-
-                # Only meaningful for the sender side
-                if self.reliable_sender is not None:
-                    # Payload carries echoed original send timestamp (uint32)
-                    echo_ts = self.unpack_ack(payload)
-                    now32 = now_ms() & 0xFFFFFFFF
-                    rtt_ms = float((now32 - (echo_ts & 0xFFFFFFFF)) & 0xFFFFFFFF)
-                    # single-source update
-                    try:
-                        self.update_rtt(rtt_ms)
-                    except Exception:
-                        pass
-
-                    self.reliable_sender.on_ack(seq, echo_ts)
-                    if self.logger:
-                        self.logger.write([
-                            now_ms(), "RX", "ACK", seq,
-                            echo_ts, rtt_ms, "", "ack", "", len(payload)
-                        ])
-                    if self.onAck:
-                        self.onAck(seq, rtt_ms)
-            # else: ignore unknown channel
-
     def _log_transport_event(self, ev: str, seq: int) -> None:
         # Always write to CSV if present
         if self.logger:
-            now = now_ms()
-            self.logger.write([now, "RX", "REL", seq, "", "", "", ev, "", 0])
+            self.logger.write_csv(f"{now_ms()},RX,REL,{seq},,,,{ev},,0\n")
         # Optionally mirror to console
         if self.verbose:
             print(f"[REL/{ev}] seq={seq}")
@@ -374,16 +590,19 @@ class GameNetAPI:
         Writes a single CSV row to sender log.
         """
         if self.logger:
-            now = now_ms()
             # CSV: ts, dir, channel, seq, send_ts_ms, rtt_ms, retries, event, deadline_t_ms, len_bytes
-            self.logger.write([now, "TX", "REL", seq, send_ts_ms, "", retries, "retransmit", "", payload_len])
+            self.logger.write_csv(
+                f"{now_ms()},TX,REL,{seq},{send_ts_ms},,{retries},retransmit,,{payload_len}\n"
+            )
         if self.verbose:
             print(f"[REL/retransmit] seq={seq} retries={retries}")
         
     def _log_tx_expire(self, seq: int, now_ts_ms: int, retries: int, payload_len: int, deadline_ms: Optional[int]) -> None:
         if self.logger:
             # ts, dir, channel, seq, send_ts_ms, rtt_ms, retries, event, deadline_t_ms, len_bytes
-            self.logger.write([now_ts_ms, "TX", "REL", seq, now_ts_ms, "", retries, "expire", (deadline_ms or ""), payload_len])
+            self.logger.write_csv(
+                f"{now_ts_ms},TX,REL,{seq},{now_ts_ms},,{retries},expire,{deadline_ms or ''},{payload_len}\n"
+            )
         if self.verbose:
             print(f"[REL/expire] seq={seq} retries={retries} deadline={deadline_ms}")
 
@@ -16,19 +16,23 @@ Layout (network byte order, big-endian):
     |                 Payload ...                  |
     +----------------------------------------------+
 """
+from functools import partial
 from typing import Tuple
 import struct
 import time
 
 __all__ = [
-    "HEADER_FMT", "HEADER_SIZE",
+    "HEADER_FMT", "HEADER_SIZE", "HEADER_STRUCT",
     "CHAN_RELIABLE", "CHAN_UNRELIABLE", "CHAN_ACK",
     "pack_header", "unpack_header", "now_ms", "MAX_SEQ",
+    "pack_header_rel", "pack_header_unrel", "pack_header_ack",
+    "pack_header_into",
 ]
 
 # struct format: unsigned char (B), unsigned short (H), unsigned int (I)
 HEADER_FMT = "!BHI"
-HEADER_SIZE = struct.calcsize(HEADER_FMT)
+HEADER_STRUCT = struct.Struct(HEADER_FMT)  # compiled once; hot paths use pack_into
+HEADER_SIZE = HEADER_STRUCT.size
 
 # Logical channels
 CHAN_RELIABLE   = 0
@@ -37,21 +41,43 @@ CHAN_ACK        = 2
 
 MAX_SEQ = 0x10000  # 65536 (wrap modulus)
 
+# Rebase the monotonic clock at import. CLOCK_MONOTONIC counts from
+# boot, so on a host up longer than ~11.6 days raw values exceed 1e9 ms
+# and the charts' unit sniffer (charts-latency.py detect_scale) would
+# misread them as seconds and inflate every RTT x1000. Relative to
+# process start they stay well under 1e9 for any realistic run.
+_T0 = time.monotonic_ns()
+
 def now_ms() -> int:
-    # Milliseconds since epoch
-    return int(time.time() * 1000)
+    # Monotonic milliseconds since process start (vDSO clock_gettime;
+    # immune to NTP jumps). All wire consumers work on differences mod
+    # 2^32, so the epoch is irrelevant on the protocol side.
+    return (time.monotonic_ns() - _T0) // 1_000_000
 
 def pack_header(channel: int, seq: int, ts_ms: int) -> bytes:
     # Pack 7-byte H-UDP header
     if channel not in (CHAN_RELIABLE, CHAN_UNRELIABLE, CHAN_ACK):
         raise ValueError(f"Invalid channel: {channel}")
-    return struct.pack(HEADER_FMT, channel & 0xFF, seq & 0xFFFF, ts_ms & 0xFFFFFFFF)
+    return HEADER_STRUCT.pack(channel & 0xFF, seq & 0xFFFF, ts_ms & 0xFFFFFFFF)
+
+# Channel-specialized packers: callers that know the channel statically
+# skip the validity check and masking in pack_header. seq/ts must already
+# be in range (seq & 0xFFFF, ts & 0xFFFFFFFF) - hot paths mask once.
+pack_header_rel   = partial(HEADER_STRUCT.pack, CHAN_RELIABLE)
+pack_header_unrel = partial(HEADER_STRUCT.pack, CHAN_UNRELIABLE)
+pack_header_ack   = partial(HEADER_STRUCT.pack, CHAN_ACK)
+
+# In-place variant for callers that build the whole wire packet in a
+# preallocated buffer: pack_header_into(buf, off, chan, seq, ts) writes
+# the 7 header bytes at off with zero intermediate bytes objects.
+pack_header_into = HEADER_STRUCT.pack_into
 
 def unpack_header(packet: bytes) -> Tuple[int, int, int, bytes]:
     # Unpack H-UDP header; returns (channel, seq, ts_ms, payload)
     if len(packet) < HEADER_SIZE:
         raise ValueError("Packet too short for H-UDP header")
-    channel, seq, ts = struct.unpack(HEADER_FMT, packet[:HEADER_SIZE])
-    payload = packet[HEADER_SIZE:]
-    return channel, seq, ts, payload
+    channel, seq, ts = HEADER_STRUCT.unpack_from(packet)
+    # Payload stays a bytes slice: callbacks decode it and the reorder
+    # buffer holds it across packets, so it must own its storage.
+    return channel, seq, ts, packet[HEADER_SIZE:]
 
@@ -6,14 +6,21 @@ Logging
 -------
 Write a CSV with columns:
   ts_recv_ms, dir, channel, seq, send_ts_ms, rtt_ms, retries, event, deadline_t_ms, len_bytes
+
+Rows are handed to a background writer thread and flushed in batches so
+the packet hot paths never block on disk I/O.
 """
 
 import csv
 import os
+import queue
 import threading
 
 class Logger:
 
+    BATCH_ROWS = 64     # flush once this many rows are pending
+    FLUSH_SECS = 0.01   # ...or after this long with a partial batch
+
     def __init__(self, path: str):
         self.path = path
         os.makedirs(os.path.dirname(path), exist_ok=True)
@@ -22,16 +29,53 @@ class Logger:
         self._w.writerow([
             "ts_recv_ms","dir","channel","seq","send_ts_ms","rtt_ms","retries","event","deadline_t_ms","len_bytes"
         ])
-        self._lock = threading.Lock()
+        self._q = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._drain, daemon=True)
+        self._thread.start()
 
     def write(self, row):
-        with self._lock:
-            self._w.writerow(row)
-            self._f.flush()
+        # Hot path: just enqueue; the writer thread owns the file.
+        self._q.put(row)
 
-    def close(self):
-        with self._lock:
+    def write_csv(self, line: str):
+        # Fast path for callers that pre-format the row as a CSV line
+        # (newline included): skips csv.writer's per-element str() pass.
+        self._q.put(line)
+
+    def _flush(self, pending):
+        # Preformatted lines go straight to the file; list/tuple rows
+        # still pass through csv.writer.
+        lines = [r for r in pending if isinstance(r, str)]
+        rows = [r for r in pending if not isinstance(r, str)]
+        if lines:
+            self._f.write("".join(lines))
+        if rows:
+            self._w.writerows(rows)
+        self._f.flush()
+        pending.clear()
+
+    def _drain(self):
+        pending = []
+        while True:
             try:
-                self._f.close()
-            except Exception:
-                pass
+                row = self._q.get(timeout=self.FLUSH_SECS)
+            except queue.Empty:
+                row = ()  # timer tick: flush whatever we have
+            if row is None:  # close sentinel
+                break
+            if row != ():
+                pending.append(row)
+                if len(pending) < self.BATCH_ROWS:
+                    continue
+            if pending:
+                self._flush(pending)
+        if pending:
+            self._flush(pending)
+
+    def close(self):
+        self._q.put(None)
+        self._thread.join(timeout=2.0)
+        try:
+            self._f.close()
+        except Exception:
+            pass
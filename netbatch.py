@@ -0,0 +1,173 @@
+"""
+CS3103 Group 10 - Batched UDP syscalls
+
+ctypes wrappers around Linux recvmmsg(2)/sendmmsg(2) so the RX loop can
+pull many datagrams per syscall and the retransmit loop can push a burst
+of packets per syscall, instead of paying one kernel crossing each.
+Callers must fall back to recvfrom()/sendto() when available() is False
+(non-Linux, or libc without the mmsg calls).
+"""
+import ctypes
+import errno
+import socket
+import sys
+from typing import List, Tuple
+
+__all__ = ["available", "RxBatch", "TxBatch"]
+
+MSG_DONTWAIT = 0x40
+
+
+class _iovec(ctypes.Structure):
+    _fields_ = [
+        ("iov_base", ctypes.c_void_p),
+        ("iov_len", ctypes.c_size_t),
+    ]
+
+
+class _sockaddr_in(ctypes.Structure):
+    _fields_ = [
+        ("sin_family", ctypes.c_ushort),
+        ("sin_port", ctypes.c_uint16),   # network byte order
+        ("sin_addr", ctypes.c_ubyte * 4),
+        ("sin_zero", ctypes.c_ubyte * 8),
+    ]
+
+
+class _msghdr(ctypes.Structure):
+    _fields_ = [
+        ("msg_name", ctypes.c_void_p),
+        ("msg_namelen", ctypes.c_uint),
+        ("msg_iov", ctypes.POINTER(_iovec)),
+        ("msg_iovlen", ctypes.c_size_t),
+        ("msg_control", ctypes.c_void_p),
+        ("msg_controllen", ctypes.c_size_t),
+        ("msg_flags", ctypes.c_int),
+    ]
+
+
+class _mmsghdr(ctypes.Structure):
+    _fields_ = [
+        ("msg_hdr", _msghdr),
+        ("msg_len", ctypes.c_uint),
+    ]
+
+
+_libc = None
+if sys.platform.startswith("linux"):
+    try:
+        _lc = ctypes.CDLL(None, use_errno=True)
+        _lc.recvmmsg  # probe
+        _lc.sendmmsg
+        _libc = _lc
+    except (OSError, AttributeError):
+        _libc = None
+
+
+def available() -> bool:
+    return _libc is not None
+
+
+class RxBatch:
+    """Preallocated mmsghdr/iovec/buffer arrays, reused for every recvmmsg call."""
+
+    def __init__(self, n: int = 32, bufsize: int = 2048):
+        self.n = n
+        self.bufsize = bufsize
+        self._bufs = [ctypes.create_string_buffer(bufsize) for _ in range(n)]
+        self._addrs = (_sockaddr_in * n)()
+        self._iovs = (_iovec * n)()
+        self._hdrs = (_mmsghdr * n)()
+        for i in range(n):
+            self._iovs[i].iov_base = ctypes.cast(self._bufs[i], ctypes.c_void_p)
+            self._iovs[i].iov_len = bufsize
+            hdr = self._hdrs[i].msg_hdr
+            hdr.msg_name = ctypes.cast(ctypes.pointer(self._addrs[i]), ctypes.c_void_p)
+            hdr.msg_namelen = ctypes.sizeof(_sockaddr_in)
+            hdr.msg_iov = ctypes.pointer(self._iovs[i])
+            hdr.msg_iovlen = 1
+
+    def recv(self, fd: int) -> List[Tuple[bytes, Tuple[str, int]]]:
+        """Non-blocking drain: up to n datagrams per syscall; [] when empty."""
+        got = _libc.recvmmsg(fd, self._hdrs, self.n, MSG_DONTWAIT, None)
+        if got < 0:
+            err = ctypes.get_errno()
+            if err in (errno.EAGAIN, errno.EWOULDBLOCK, errno.EINTR):
+                return []
+            raise OSError(err, "recvmmsg failed")
+        out = []
+        for i in range(got):
+            ln = self._hdrs[i].msg_len
+            sa = self._addrs[i]
+            addr = (socket.inet_ntoa(bytes(sa.sin_addr)), socket.ntohs(sa.sin_port))
+            out.append((self._bufs[i].raw[:ln], addr))
+            self._hdrs[i].msg_hdr.msg_namelen = ctypes.sizeof(_sockaddr_in)
+        return out
+
+
+class TxBatch:
+    """Preallocated mmsghdr/iovec arrays for sendmmsg; iovecs point straight
+    into the caller's packet buffers (no copy), all datagrams to one peer."""
+
+    def __init__(self, n: int = 32):
+        self.n = n
+        self._addr = _sockaddr_in()
+        self._iovs = (_iovec * n)()
+        self._hdrs = (_mmsghdr * n)()
+        addr_p = ctypes.cast(ctypes.pointer(self._addr), ctypes.c_void_p)
+        for i in range(n):
+            hdr = self._hdrs[i].msg_hdr
+            hdr.msg_name = addr_p
+            hdr.msg_namelen = ctypes.sizeof(_sockaddr_in)
+            hdr.msg_iov = ctypes.pointer(self._iovs[i])
+            hdr.msg_iovlen = 1
+        self._cached_addr = ()  # sentinel: neither an addr nor None yet
+
+    def _set_addr(self, addr) -> None:
+        if addr == self._cached_addr:
+            return
+        if addr is None:
+            # connected socket: the kernel rejects an explicit msg_name
+            # with EISCONN, so clear it and let the connection route
+            for i in range(self.n):
+                self._hdrs[i].msg_hdr.msg_name = None
+                self._hdrs[i].msg_hdr.msg_namelen = 0
+        else:
+            if self._cached_addr in ((), None):
+                addr_p = ctypes.cast(ctypes.pointer(self._addr), ctypes.c_void_p)
+                for i in range(self.n):
+                    self._hdrs[i].msg_hdr.msg_name = addr_p
+                    self._hdrs[i].msg_hdr.msg_namelen = ctypes.sizeof(_sockaddr_in)
+            host, port = addr
+            self._addr.sin_family = socket.AF_INET
+            self._addr.sin_port = socket.htons(port)
+            self._addr.sin_addr = (ctypes.c_ubyte * 4).from_buffer_copy(socket.inet_aton(host))
+        self._cached_addr = addr
+
+    def send(self, fd: int, pkts: list, addr) -> int:
+        """Send all pkts (writable buffers, e.g. bytearray) to addr - or on
+        the socket's connected peer when addr is None - with as few
+        sendmmsg calls as possible; returns the number sent."""
+        self._set_addr(addr)
+        sent_total = 0
+        i = 0
+        total = len(pkts)
+        while i < total:
+            chunk = pkts[i:i + self.n]
+            views = []  # keep from_buffer views alive across the syscall
+            for j, p in enumerate(chunk):
+                v = (ctypes.c_char * len(p)).from_buffer(p)
+                views.append(v)
+                self._iovs[j].iov_base = ctypes.cast(v, ctypes.c_void_p)
+                self._iovs[j].iov_len = len(p)
+            got = _libc.sendmmsg(fd, self._hdrs, len(chunk), 0)
+            if got < 0:
+                err = ctypes.get_errno()
+                if err == errno.EINTR:
+                    continue
+                raise OSError(err, "sendmmsg failed")
+            if got == 0:
+                break  # defensive: avoid spinning if the kernel takes none
+            sent_total += got
+            i += got  # kernel may take fewer than the chunk; resume there
+        return sent_total
@@ -1,5 +1,20 @@
 import argparse, socket, time, json
 from gamenetapi import GameNetAPI
+from utilities import MOCK_STRUCT
+
+try:  # optional: C JSON codec; takes bytes directly, ~10x stdlib parse
+    import orjson
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads  # stdlib also accepts bytes, just slower
+
+
+def _parse_game_data(b):
+    # Packed binary from make_mock_game_data; JSON fallback for older senders.
+    if len(b) == MOCK_STRUCT.size:
+        i, ts, x, y = MOCK_STRUCT.unpack(b)
+        return {"i": i, "ts": ts, "x": x, "y": y}
+    return _loads(b)
 
 def main():
     ap = argparse.ArgumentParser()
@@ -20,21 +35,32 @@ def main():
     if args.peer_host and args.peer_port:
         api.set_peer((args.peer_host, args.peer_port))
 
-    def on_rel(b: bytes):
-        # app-layer handling for reliable messages
-        try:
-            obj = json.loads(b.decode("utf-8"))
-            print(f"[REL] i={obj.get('i')} ts={obj.get('ts')} x={obj.get('x'):.3f} y={obj.get('y'):.3f}")
-        except Exception:
-            print(f"[REL] {len(b)} bytes")
-
-    def on_unrel(b: bytes):
-        # app-layer handling for unreliable messages
-        try:
-            obj = json.loads(b.decode("utf-8"))
-            print(f"[UNR] i={obj.get('i')} ts={obj.get('ts')} x={obj.get('x'):.3f} y={obj.get('y'):.3f}")
-        except Exception:
-            print(f"[UNR] {len(b)} bytes")
+    counts = {"rel": 0, "unrel": 0}
+
+    if args.verbose:
+        # per-packet prints only when asked for: f-string formatting and
+        # stdout writes on every arrival otherwise dominate the callback
+        def on_rel(b: bytes):
+            counts["rel"] += 1
+            try:
+                obj = _parse_game_data(b)
+                print(f"[REL] i={obj.get('i')} ts={obj.get('ts')} x={obj.get('x'):.3f} y={obj.get('y'):.3f}")
+            except Exception:
+                print(f"[REL] {len(b)} bytes")
+
+        def on_unrel(b: bytes):
+            counts["unrel"] += 1
+            try:
+                obj = _parse_game_data(b)
+                print(f"[UNR] i={obj.get('i')} ts={obj.get('ts')} x={obj.get('x'):.3f} y={obj.get('y'):.3f}")
+            except Exception:
+                print(f"[UNR] {len(b)} bytes")
+    else:
+        def on_rel(b: bytes):
+            counts["rel"] += 1
+
+        def on_unrel(b: bytes):
+            counts["unrel"] += 1
 
     api.set_callbacks(on_rel, on_unrel)
     api.start()
@@ -47,6 +73,7 @@ def main():
         pass
     finally:
         api.stop()
+        print(f"Received {counts['rel']} reliable / {counts['unrel']} unreliable messages")
 
 if __name__ == "__main__":
     main()
@@ -1,19 +1,76 @@
 # reliable.py
+import collections
+import heapq
 import struct
 import threading
-import time
-from typing import Callable, Optional, Tuple, Dict
+from typing import Callable, Optional, Tuple
 
-from header import pack_header, now_ms, CHAN_RELIABLE
+from header import pack_header_into, now_ms, CHAN_RELIABLE, HEADER_SIZE
+import netbatch
 
 # 16-bit sequence space (from our 7B H-UDP header: SeqNo is uint16)
 MAX_SEQ  = 1 << 16
 HALF_SEQ = MAX_SEQ >> 1
 MASK16   = MAX_SEQ - 1
 
-srtt = None
-rttvar = None
-_k = 3.0
+TS_OFFSET = 3  # byte offset of the uint32 timestamp in the !BHI header
+_TS_STRUCT = struct.Struct("!I")
+
+# Sender inflight ring: power of two, comfortably above any realistic
+# in-flight window and far below the 2^16 seq space, so seq & RING_MASK
+# slots can only collide once a packet is 2048 sends stale.
+RING = 2048
+RING_MASK = RING - 1
+
+# Modular sequence arithmetic as plain module-level functions: these run
+# once or more per received packet, and a global lookup plus direct call
+# is cheaper than bound-method dispatch through the instance.
+
+def seq_eq(a: int, b: int) -> bool:
+    return ((a ^ b) & MASK16) == 0
+
+def seq_less(a: int, b: int) -> bool:
+    # True iff a comes before b in modulo-2^16 order. The forward
+    # distance is 0 only when a == b, so one chained compare covers
+    # both the half-space test and the equality exclusion.
+    return 0 < ((b - a) & MASK16) < HALF_SEQ
+
+def seq_dist_fwd(a: int, b: int) -> int:
+    # Forward distance a->b in modulo-2^16.
+    return (b - a) & MASK16
+
+def _noop(*_a) -> None:
+    # Stand-in for disabled log callbacks: hot paths call self._log
+    # unconditionally instead of testing a flag per event.
+    pass
+
+def in_window(base: int, s: int, win: int) -> bool:
+    # Is s within (base, base+win] ahead (mod 2^16)? Wrap identity:
+    # (s - base - 1) mod 2^16 is in [0, win) iff s is in (base, base+win],
+    # so one subtract/mask/compare replaces the two-sided range test.
+    return ((s - base - 1) & MASK16) < win
+
+class InflightRec:
+    # Per-packet retransmit state. __slots__ keeps instances compact and
+    # turns every field access in the hot loops into a fixed-offset load
+    # instead of a dict hash probe.
+    __slots__ = ("seq", "wire", "len", "last_tx", "retries", "first_ts",
+                 "urgency", "deadline_ms", "expiry_ts", "retx_at", "gen")
+
+    def __init__(self, seq: int, wire: bytearray, length: int, ts: int,
+                 urgency: int, deadline_ms: Optional[int]):
+        self.seq = seq
+        self.wire = wire
+        self.len = length
+        self.last_tx = ts
+        self.retries = 0
+        self.first_ts = ts
+        self.urgency = urgency
+        self.deadline_ms = deadline_ms
+        self.expiry_ts = (ts + deadline_ms) if deadline_ms is not None else None
+        self.retx_at = 0  # cached by _next_deadline on drain
+        self.gen = 0      # assigned by the retx thread on drain
+
 
 class ReliableSender:
     # Tracks in-flight REL packets and retransmits on RTO.
@@ -24,18 +81,45 @@ class ReliableSender:
         get_rto_ms: Callable[[], int],
         log_retx_cb: Optional[Callable[[int, int, int, int], None]] = None,
         log_expire_cb: Optional[Callable[[int, int, int, int, Optional[int]], None]] = None,
+        connected: bool = False,
     ):
         self.sock = sock
         self.peer = peer
         self.rtt = get_rto_ms
+        # connected=True means the caller did sock.connect(peer): the
+        # kernel caches the route and we use the cheaper send() with no
+        # per-packet sockaddr copy/validation
+        self._connected = connected
+        self._send_wire = sock.send if connected else self._sendto_peer
         self._seq = 0
-        self._inflight: Dict[int, Dict] = {}
-        self._lock = threading.Lock()
+        # inflight table as a flat ring + live bitmap instead of a dict:
+        # slot = seq & RING_MASK, no hashing or per-send dict allocation.
+        # Ring, bitmap, heap and gen counter are private to the retx
+        # thread; send()/on_ack() hand work over via the deques below.
+        self._ring: list = [None] * RING
+        self._live = bytearray(RING)
+        # Handoff queues: deque.append/popleft are atomic under the GIL,
+        # so the hot send/ack paths never block on the retx thread. The
+        # Condition is only the wakeup channel, held just for notify/wait.
+        self._tx_queue: collections.deque = collections.deque()
+        self._ack_queue: collections.deque = collections.deque()
+        self._cond = threading.Condition()
+        # timer min-heap of (when_ms, seq, gen); gen invalidates stale
+        # entries after an ack or a retransmit without O(N) heap surgery
+        self._timer_heap: list = []
+        self._gen_counter = 0
         self._running = False
         self._thr = threading.Thread(target=self._loop, daemon=True)
         self._log_retx_cb = log_retx_cb
         self._log_expire_cb = log_expire_cb
+        # Retransmit bursts (loss storms) coalesce into one sendmmsg
+        # where the platform has it; used only by the retx thread.
+        self._txb = netbatch.TxBatch() if netbatch.available() else None
+
 
+    def _sendto_peer(self, wire) -> None:
+        # Unconnected path; reads self.sock per call so tests can swap it.
+        self.sock.sendto(wire, self.peer)
 
     def start(self):
         self._running = True
@@ -45,108 +129,246 @@ class ReliableSender:
 
     def stop(self):
         self._running = False
+        with self._cond:
+            self._cond.notify()
         if self._thr.is_alive():
             self._thr.join(timeout=0.2)
 
     def send(self, payload: bytes, urgency_ms: int = 0, deadline_ms: Optional[int] = None) -> int:
 
-        # Allocates seq, sends once, stores state for retransmit.
-        with self._lock:
-            seq = self._seq & 0xFFFF
-            self._seq = (self._seq + 1) & 0xFFFF
-            ts = now_ms()
-            pkt = pack_header(CHAN_RELIABLE, seq, ts) + payload
-            self.sock.sendto(pkt, self.peer)
-            self._inflight[seq] = {
-                "payload": payload,
-                "last_tx": ts,
-                "retries": 0,
-                "first_ts": ts,
-                "urgency": max(0, int(urgency_ms)),
-                "deadline_ms": int(deadline_ms) if deadline_ms is not None else None,
-                "expiry_ts": (ts + int(deadline_ms)) if deadline_ms is not None else None,
-            }
-            return seq
-
-    def on_ack(self, seq: int, echo_ts_ms: int):
-        now32   = now_ms() & 0xFFFFFFFF
-        send32  = echo_ts_ms & 0xFFFFFFFF
-        sample  = (now32 - send32) & 0xFFFFFFFF
-
-        #if sample <= 10_000:
-        #    self.rtt.update(sample)
+        # Allocates seq, sends once, hands the record to the retx thread.
+        # Lock-free: the single app thread owns _seq, and the deque
+        # append is atomic; only the notify touches the Condition.
+        seq = self._seq & 0xFFFF
+        self._seq = (self._seq + 1) & 0xFFFF
+        ts = now_ms()
+        # Build the wire packet once and cache it: retransmits only
+        # rewrite the 4-byte timestamp in place, no re-concat/copy.
+        wire = bytearray(HEADER_SIZE + len(payload))
+        pack_header_into(wire, 0, CHAN_RELIABLE, seq, ts & 0xFFFFFFFF)
+        wire[HEADER_SIZE:] = payload
+        rec = InflightRec(
+            seq, wire, len(payload), ts,
+            max(0, int(urgency_ms)),
+            int(deadline_ms) if deadline_ms is not None else None,
+        )
+        # Queue the record before the packet hits the wire: the ACK can
+        # race the handoff otherwise (arrive while the record is still
+        # in this queue), and _drain_queues must be able to find it.
+        self._tx_queue.append(rec)
+        self._send_wire(wire)
+        with self._cond:
+            self._cond.notify()
+        return seq
 
-        with self._lock:
-            self._inflight.pop(seq, None)
+    def _lookup(self, seq: int) -> Optional[InflightRec]:
+        # Live record for seq, or None. Ring slot may hold a record for a
+        # different (wrapped) seq; the stored seq disambiguates.
+        i = seq & RING_MASK
+        if not self._live[i]:
+            return None
+        rec = self._ring[i]
+        if rec is None or rec.seq != seq:
+            return None
+        return rec
+
+    def _evict(self, seq: int) -> None:
+        i = seq & RING_MASK
+        self._live[i] = 0
+        self._ring[i] = None
+
+    @staticmethod
+    def _next_deadline(rec: InflightRec, rto: int) -> int:
+        # Earliest of the RTO-based retransmit time and the hard expiry.
+        # The retx time is cached on the record so the due check in _loop
+        # is one stored compare, not re-derived arithmetic per heap pop.
+        deadline = rec.last_tx + max(80, rto - rec.urgency)
+        rec.retx_at = deadline
+        exp = rec.expiry_ts
+        return deadline if exp is None else min(deadline, exp)
+
+    def on_ack(self, seq: int, echo_ts_ms: int) -> Optional[int]:
+        # Returns the retry count of the acked packet (0 = first tx), or
+        # None if the seq was unknown, so the caller can apply Karn's
+        # rule and skip RTT samples from retransmitted packets.
+        # The ring read is unlocked: benign race with the retx thread —
+        # at worst the retry count is one transmission stale, which only
+        # affects whether this one RTT sample is taken. Eviction itself
+        # happens on the retx thread when it drains the ack queue.
+        rec = self._lookup(seq)
+        self._ack_queue.append(seq)
+        with self._cond:
+            self._cond.notify()
+        if rec is None:
+            return None
+        return rec.retries
+
+    _IDLE_WAIT_S = 1.0  # wake interval when nothing is in flight
+
+    def _drain_tx(self, rto: int) -> None:
+        # Absorb handed-off sends into the thread-private ring and heap.
+        # Runs only on the retx thread; deque.popleft is atomic so no
+        # lock is needed against the producers.
+        txq = self._tx_queue
+        while txq:
+            rec = txq.popleft()
+            self._gen_counter += 1
+            gen = self._gen_counter
+            rec.gen = gen
+            seq = rec.seq
+            i = seq & RING_MASK
+            self._ring[i] = rec  # a still-live slot this old is long dead
+            self._live[i] = 1
+            heapq.heappush(self._timer_heap, (self._next_deadline(rec, rto), seq, gen))
+
+    def _drain_queues(self, rto: int) -> None:
+        self._drain_tx(rto)
+        ackq = self._ack_queue
+        while ackq:
+            seq = ackq.popleft()
+            if self._lookup(seq) is None:
+                # send() queues the record before the first transmission,
+                # so an ACK can only be ahead of its record if the send
+                # landed in _tx_queue after the drain above (e.g. while
+                # this loop runs). Absorb any new records and retry
+                # before writing the ACK off as a duplicate - dropping
+                # it here would leave the packet to expire or retransmit
+                # despite having been delivered.
+                self._drain_tx(rto)
+                if self._lookup(seq) is None:
+                    continue  # true duplicate for an already-evicted seq
+            self._evict(seq)  # any heap entry for seq is now stale
 
     def _loop(self):
+        # Deadline-driven: pop only due timer-heap entries (O(log N) per
+        # event, no per-tick snapshot of the whole table) and sleep until
+        # the heap top or until send/on_ack/stop notify. All inflight
+        # state is owned by this thread, so deadline processing and
+        # retransmit bookkeeping run without any lock.
         while self._running:
-            time.sleep(0.01)
             now = now_ms()
             rto = self.rtt()
-            with self._lock:
-                to_expire = []
-                to_retx = []
-                for seq, rec in list(self._inflight.items()):
-                    # 1) Expiry: stop retrying after per-packet deadline
-                    exp = rec.get("expiry_ts")
-                    if exp is not None and now >= exp:
-                        to_expire.append((seq, rec))
-                        continue
-                    # 2) RTO-based retransmission (existing behavior, urgency shortens wait)
-                    deadline = rec["last_tx"] + max(80, rto - rec["urgency"])
-                    if now >= deadline:
-                        to_retx.append((seq, rec))
-
-            # Handle expirations outside the lock
+            self._drain_queues(rto)
+            to_expire = []
+            to_retx = []
+            heap = self._timer_heap
+            while heap and heap[0][0] <= now:
+                _when, seq, gen = heapq.heappop(heap)
+                rec = self._lookup(seq)
+                if rec is None or rec.gen != gen:
+                    continue  # stale entry (acked or superseded)
+                # 1) Expiry: stop retrying after per-packet deadline
+                exp = rec.expiry_ts
+                if exp is not None and now >= exp:
+                    to_expire.append((seq, rec))
+                    self._evict(seq)
+                    continue
+                # 2) RTO-based retransmission (urgency shortens wait)
+                if now >= rec.retx_at:
+                    to_retx.append((seq, rec))
+                else:
+                    # fired early (rto shrank since push); reschedule
+                    heapq.heappush(heap, (self._next_deadline(rec, rto), seq, gen))
+
+            # Handle expirations (log callbacks may block; state is done)
             for seq, rec in to_expire:
                 try:
                     if self._log_expire_cb:
                         # args: seq, now_ts, retries, payload_len, original_deadline_ms
-                        self._log_expire_cb(seq, now, rec.get("retries", 0), len(rec.get("payload", b"")), rec.get("deadline_ms"))
+                        self._log_expire_cb(seq, now, rec.retries, rec.len, rec.deadline_ms)
                 except Exception:
                     pass
-                with self._lock:
-                    self._inflight.pop(seq, None)
 
-            # Handle retransmissions outside the lock
+            # Handle retransmissions. When several are due in the same
+            # wake, stamp them all with one timestamp and push the burst
+            # through a single sendmmsg; otherwise (or if the batch path
+            # is unavailable/fails) fall back to per-packet sendto.
+            # Reuse the tick's clock read for every retransmit: one
+            # now_ms() per wake instead of one per packet. The timestamp
+            # bias is bounded by the time spent in this wake, well inside
+            # existing RTO noise.
+            ts = now
+            batched = False
+            if self._txb is not None and len(to_retx) > 1:
+                try:
+                    wires = []
+                    for _seq, rec in to_retx:
+                        _TS_STRUCT.pack_into(rec.wire, TS_OFFSET, ts & 0xFFFFFFFF)
+                        wires.append(rec.wire)
+                    self._txb.send(self.sock.fileno(), wires,
+                                   None if self._connected else self.peer)
+                    batched = True
+                except Exception:
+                    batched = False  # mocked/odd sockets, non-IPv4 peer, ...
             for seq, rec in to_retx:
                 try:
-                    ts = now_ms()
-                    pkt = pack_header(CHAN_RELIABLE, seq, ts) + rec["payload"]
-                    self.sock.sendto(pkt, self.peer)
-                    with self._lock:
-                        rec["last_tx"] = ts
-                        rec["retries"] += 1
+                    if not batched:
+                        # refresh only the timestamp field of the cached packet
+                        _TS_STRUCT.pack_into(rec.wire, TS_OFFSET, ts & 0xFFFFFFFF)
+                        self._send_wire(rec.wire)
+                    rec.last_tx = ts
+                    rec.retries += 1
+                    self._gen_counter += 1
+                    gen = self._gen_counter
+                    rec.gen = gen
+                    heapq.heappush(self._timer_heap, (self._next_deadline(rec, rto), seq, gen))
                     if self._log_retx_cb:
                         try:
                             # args: seq, send_ts_ms, retries, payload_len
-                            self._log_retx_cb(seq, ts, rec["retries"], len(rec["payload"]))
+                            self._log_retx_cb(seq, ts, rec.retries, rec.len)
                         except Exception:
                             pass
                 except Exception:
-                    # swallow and continue; next tick will retry/expire
+                    # swallow and continue; next wake will retry/expire
                     pass
 
+            # drop stale tops so the wait targets a real deadline
+            heap = self._timer_heap
+            while heap:
+                _when, seq, gen = heap[0]
+                rec = self._lookup(seq)
+                if rec is None or rec.gen != gen:
+                    heapq.heappop(heap)
+                    continue
+                break
+            with self._cond:
+                if not self._running:
+                    break
+                if self._tx_queue or self._ack_queue:
+                    continue  # work arrived between drain and here
+                if not heap:
+                    self._cond.wait(self._IDLE_WAIT_S)
+                else:
+                    delta_s = (heap[0][0] - now_ms()) / 1000.0
+                    if delta_s > 0:
+                        self._cond.wait(delta_s)
+
 class ReliableReceiver:
     # ACKs every REL packet; delivers in-order with a small reordering buffer.
     def __init__(self, deliver_cb: Callable[[bytes], None], send_ack_cb: Callable[[int, int], None], log_cb: Optional[Callable[[str, int], None]] = None):
         self.deliver_cb = deliver_cb
         self.send_ack_cb = send_ack_cb
         self.expected_seq: Optional[int] = None
-        self.buf: Dict[int, Tuple[bytes, int, int]] = {}            # Reordering buffer: seq -> (payload, send_ts_ms, arrival_ms)
-        self.max_buf = 1024                                         # Adjustable Buffer
+        self.max_buf = 1024                                         # Adjustable Buffer (power of two)
+        # Reordering buffer as a flat circular array + presence bitmap
+        # instead of a dict: slot = seq & (max_buf-1), so buffering and
+        # the drain probe are one index each, with no hashing and no
+        # per-packet tuple-in-dict bookkeeping. Memory is fixed at
+        # construct time. Every present entry is ahead of expected_seq
+        # (drain can never advance past a present slot), so "anything
+        # buffered ahead?" is a counter test, no bitmap scan.
+        assert (self.max_buf & (self.max_buf - 1)) == 0, "max_buf must be a power of two"
+        self._buf_mask = self.max_buf - 1
+        self._slots: list = [None] * self.max_buf                   # slot -> (payload, send_ts_ms, arrival_ms)
+        self._present = bytearray(self.max_buf)
+        self._present_count = 0
         self._lock = threading.Lock()                               # RX thread safety (GameNetAPI runs on a background thread)
-        self.log_cb = log_cb
+        self._log = log_cb if log_cb is not None else _noop         # bound once; no per-event enabled test
         # --- gap timer state (skip-after-t) ---
         self._gap_start_ms: Optional[int] = None
         self._gap_deadline_ms: Optional[int] = None
         self._gap_t_fn: Callable[[int], int] = lambda urgency_ms=0: 200
 
-    def _log(self, ev: str, seq: int) -> None:
-        if self.log_cb:
-            self.log_cb(ev, seq)
-            
     def set_gap_deadline_fn(self, fn: Callable[[int], int]) -> None:
         self._gap_t_fn = fn
 
@@ -156,47 +378,55 @@ class ReliableReceiver:
 
     def _drain_in_order(self) -> None:
         # Deliver any buffered packets that have become contiguous.
-        while self.expected_seq in self.buf:
-            self._log("deliver", self.expected_seq)   
-            payload, _send_ts, _arr = self.buf.pop(self.expected_seq)
+        i = self.expected_seq & self._buf_mask  # type: ignore[operator]
+        delivered = False
+        while self._present[i]:
+            self._log("deliver", self.expected_seq)
+            payload, _send_ts, _arr = self._slots[i]
+            self._slots[i] = None
+            self._present[i] = 0
+            self._present_count -= 1
             self.deliver_cb(payload)
-            self._advance_expected()
-            if self.expected_seq is not None:
-                ahead = [s for s in self.buf.keys() if self.in_window(self.expected_seq, s, self.max_buf)]
-                if ahead:
-                    now = now_ms()
-                    self._gap_start_ms = now
-                    self._gap_deadline_ms = now + int(self._gap_t_fn(0))
-                else:
-                    self._gap_start_ms = None
-                    self._gap_deadline_ms = None
+            # inlined _advance_expected: no method dispatch per delivery
+            self.expected_seq = (self.expected_seq + 1) & MASK16
+            delivered = True
+            i = self.expected_seq & self._buf_mask  # type: ignore[operator]
+        if delivered:
+            if self._present_count:
+                now = now_ms()
+                self._gap_start_ms = now
+                self._gap_deadline_ms = now + int(self._gap_t_fn(0))
+            else:
+                self._gap_start_ms = None
+                self._gap_deadline_ms = None
     
-    def seq_eq(self, a: int, b: int) -> bool:
-        return ((a ^ b) & MASK16) == 0
-
-    def seq_less(self, a: int, b: int) -> bool:
-        #True iff a comes before b in modulo-2^16 order.
-        return ((b - a) & MASK16) < HALF_SEQ and not self.seq_eq(a, b)
-
-    def seq_dist_fwd(self, a: int, b: int) -> int:
-        # Forward distance a->b in modulo-2^16.
-        return (b - a) & MASK16
-
-    def in_window(self, base: int, s: int, win: int) -> bool:
-        # Is s within (base, base+win] ahead (mod 2^16)?
-        d = self.seq_dist_fwd(base, s)
-        return 0 < d <= win
+    # Module-level seq arithmetic, re-exposed for existing call sites.
+    seq_eq = staticmethod(seq_eq)
+    seq_less = staticmethod(seq_less)
+    seq_dist_fwd = staticmethod(seq_dist_fwd)
+    in_window = staticmethod(in_window)
 
     def on_packet(self, seq: int, send_ts_ms: int, payload: bytes) -> None:
         # Always ACK immediately so sender RTT/RTO keeps working.
         self.send_ack_cb(seq, send_ts_ms)
-        arrival = now_ms()
+        seq &= MASK16  # mask once; the fast path is then a plain int compare
 
         with self._lock:
 
+            # Fast path: the overwhelmingly common in-order arrival.
+            # No clock read, no gap-timer inspection - delivery and the
+            # drain keep the gap state correct.
+            if seq == self.expected_seq:
+                self.deliver_cb(payload)
+                self._log("deliver", seq)
+                self._advance_expected()
+                self._drain_in_order()
+                return
+
+            arrival = now_ms()
+
             if self._gap_deadline_ms is not None and arrival >= self._gap_deadline_ms and self.expected_seq is not None:
-                have_ahead = any(self.in_window(self.expected_seq, s, self.max_buf) for s in self.buf.keys())
-                if have_ahead:
+                if self._present_count:
                     self._log("skip", self.expected_seq)
                     self._advance_expected()
                     self._drain_in_order()
@@ -209,16 +439,20 @@ class ReliableReceiver:
                 self._drain_in_order()
                 return
 
-            if self.seq_eq(seq, self.expected_seq):
+            if seq == self.expected_seq:
+                # became in-order after a gap skip advanced expected_seq
                 self.deliver_cb(payload)
                 self._log("deliver", seq)
                 self._advance_expected()
                 self._drain_in_order()
                 return
 
-            if self.seq_less(self.expected_seq, seq):
-                if seq not in self.buf and self.in_window(self.expected_seq, seq, self.max_buf):
-                    self.buf[seq] = (payload, send_ts_ms, arrival)
+            if seq_less(self.expected_seq, seq):
+                i = seq & self._buf_mask
+                if not self._present[i] and in_window(self.expected_seq, seq, self.max_buf):
+                    self._slots[i] = (payload, send_ts_ms, arrival)
+                    self._present[i] = 1
+                    self._present_count += 1
                     self._log("buffer", seq)
                     if self._gap_start_ms is None:
                         self._gap_start_ms = arrival
@@ -14,14 +14,26 @@ def main():
     ap.add_argument("--print-every", type=int, default=20, help="Print a status line every N sends (when --verbose)")
     ap.add_argument("--t-mode", choices=["static","dynamic"], default="dynamic", help="Timer mode for deadlines")
     ap.add_argument("--t-static-ms", type=int, default=200, help="Static t (ms) when --t-mode=static")
+    ap.add_argument("--kernel-pacing", action="store_true", help="Cap the socket with SO_MAX_PACING_RATE (Linux fq qdisc)")
     args = ap.parse_args()
 
     sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    if args.kernel_pacing:
+        # Offload burst smoothing to the kernel: the fq qdisc spaces
+        # packets at this byte rate, so catch-up bursts from the sleep
+        # scheduler (e.g. after a stall) go out evenly instead of
+        # back-to-back. ~64B covers payload + H-UDP + UDP/IP overhead.
+        _SO_MAX_PACING_RATE = getattr(socket, "SO_MAX_PACING_RATE", 47)
+        try:
+            sock.setsockopt(socket.SOL_SOCKET, _SO_MAX_PACING_RATE, max(1, args.pps) * 64)
+        except OSError:
+            print("[CONFIG] SO_MAX_PACING_RATE unsupported here; using sleep pacing only")
     api = GameNetAPI(sock,
                      log_path=args.log,
                      t_mode=args.t_mode,
                      t_static_ms=args.t_static_ms,
-                     verbose=args.verbose)
+                     verbose=args.verbose,
+                     connect=True)  # fixed peer: let the kernel cache the route
     api.set_peer((args.host, args.port))
 
     # --- static-t override for testing ---
@@ -43,13 +55,24 @@ def main():
     api.start()
 
     interval = 1.0 / max(1, args.pps)
-    end_time = time.time() + args.duration
+    # channel die as one integer draw: getrandbits skips the float
+    # conversion in random.random(), and the ratio compare is done in
+    # 16-bit fixed point precomputed once
+    rel_threshold = int(args.reliable_ratio * 65536)
+    getrandbits = random.getrandbits
+    start = time.monotonic()
+    end_time = start + args.duration
+    next_send = start
     i = 0
 
     try:
-        next_send = time.time()
-        while time.time() < end_time:
-            reliable = (random.random() < args.reliable_ratio)
+        while True:
+            # one monotonic read per iteration, reused for the stop check
+            # and the sleep; immune to wall-clock (NTP) jumps
+            now = time.monotonic()
+            if now >= end_time:
+                break
+            reliable = getrandbits(16) < rel_threshold
             payload = make_mock_game_data(i)
             api.send(payload, reliable=reliable, urgency_ms=0)
 
@@ -62,11 +85,13 @@ def main():
 
             i += 1
             next_send += interval
-            sleep_for = next_send - time.time()
+            # absolute schedule: a long sleep here shrinks the next one,
+            # so pacing doesn't drift with per-iteration overhead
+            sleep_for = next_send - now
             if sleep_for > 0:
                 time.sleep(sleep_for)
             else:
-                next_send = time.time()
+                next_send = now
     finally:
         api.stop()
 
@@ -2,18 +2,39 @@ import argparse, csv, os, sys
 
 # Convert GameNetAPI CSV logs into simple text logs for charts-latency.py.
 
+try:  # optional: vectorized CSV path; the row loop below is the fallback
+    import pandas as _pd
+except ImportError:
+    _pd = None
+
 CHAN_MAP = {"REL": 0, "UNREL": 1}
+# Pre-stringified labels, bound .get: one call per row replaces the
+# 'in' test plus the [] index (two hash probes), and the output path
+# never re-calls str() on the value.
+_CHAN_STR = {k: str(v) for k, v in CHAN_MAP.items()}
+_chan_val = _CHAN_STR.get
 
 def default_out_path(csv_path: str, mode: str) -> str:
     base_dir = os.path.dirname(csv_path) or "."
     name = "sender_log.txt" if mode == "sender" else "receiver_log.txt"
     return os.path.join(base_dir, name)
 
-def _get(row, *names, default=""):
+# 1 MiB I/O buffers: ~128x fewer read()/write() syscalls than the 8 KiB
+# default, and output lines are batched through writelines in groups of
+# this many to amortize the Python->C crossing.
+_IO_BUF = 1 << 20
+_BATCH_LINES = 4096
+
+def _col_idx(header, *names) -> int:
+    # Resolve tolerant column aliases once per file instead of probing a
+    # dict per row (DictReader costs a dict build + ~8 hash lookups/row).
     for n in names:
-        if n in row and row[n] != "":
-            return row[n]
-    return default
+        if n in header:
+            return header.index(n)
+    return -1
+
+def _cell(row, idx) -> str:
+    return row[idx] if 0 <= idx < len(row) else ""
 
 def _maybe_sender_csv(csv_path: str) -> str:
     # If user passed receiver.csv but we need ACKs, fall back to sibling sender.csv
@@ -22,74 +43,187 @@ def _maybe_sender_csv(csv_path: str) -> str:
     return cand if os.path.exists(cand) else csv_path
 
 def _emit_sender_lines(r, g) -> int:
+    header = next(r, None)
+    if header is None:
+        return 0
+    DIR = _col_idx(header, "dir")
+    CH  = _col_idx(header, "channel", "chan")  # be tolerant
+    SEQ = _col_idx(header, "seq")
+    RTT = _col_idx(header, "rtt_ms", "rtt")
     written = 0
+    batch = []
+    append = batch.append
     for row in r:
-        dir_ = (_get(row, "dir").upper())
-        ch   = _get(row, "channel", "chan")  # be tolerant
-        seq  = _get(row, "seq")
-        size = _get(row, "size")
-        ts   = _get(row, "ts", "timestamp")
-        if ch not in CHAN_MAP and ch != "ACK":
+        ch = _cell(row, CH)
+        cv = _chan_val(ch)
+        if cv is None and ch != "ACK":
             continue
-        if dir_ == "TX" and ch in CHAN_MAP:
+        dir_ = _cell(row, DIR).upper()
+        seq = _cell(row, SEQ)
+        if dir_ == "TX" and cv is not None:
             seq_val = seq if seq != "" else "0"
-            g.write(f"SeqNo: {seq_val} ChannelType: {CHAN_MAP[ch]}\n")
+            append(f"SeqNo: {seq_val} ChannelType: {cv}\n")
             written += 1
         elif dir_ == "RX" and ch == "ACK":
-            rtt = _get(row, "rtt_ms", "rtt")
+            rtt = _cell(row, RTT)
             if seq and rtt:
-                rtt_str = f"{rtt}ms" if not str(rtt).endswith("ms") else str(rtt)
-                g.write(f"SeqNo: {seq} ChannelType: 0 RTT: {rtt_str}\n")
+                rtt_str = f"{rtt}ms" if not rtt.endswith("ms") else rtt
+                append(f"SeqNo: {seq} ChannelType: 0 RTT: {rtt_str}\n")
                 written += 1
+        if len(batch) >= _BATCH_LINES:
+            g.writelines(batch)
+            batch.clear()
+    g.writelines(batch)
     return written
 
 def _emit_receiver_lines(r, g) -> int:
+    header = next(r, None)
+    if header is None:
+        return 0
+    DIR  = _col_idx(header, "dir")
+    CH   = _col_idx(header, "channel", "chan")
+    SEQ  = _col_idx(header, "seq")
+    TS   = _col_idx(header, "ts", "timestamp")
+    TSS  = _col_idx(header, "ts_send")
+    SIZE = _col_idx(header, "size")
+    ACT  = _col_idx(header, "action", "event")
     written = 0
+    batch = []
+    append = batch.append
     for row in r:
-        dir_ = (_get(row, "dir").upper())
-        ch   = _get(row, "channel", "chan")
-        seq  = _get(row, "seq")
-        ts   = _get(row, "ts", "timestamp")
-        tss  = _get(row, "ts_send")
-        size = _get(row, "size")
-        act  = _get(row, "action", "event").lower()
-        if dir_ == "RX" and ch in ("REL", "UNREL"):
-            g.write(f"[RECV] {ch} seq={seq} ts_send={tss} ts={ts} size={size}\n")
+        if _cell(row, DIR).upper() != "RX":
+            continue
+        ch = _cell(row, CH)
+        seq = _cell(row, SEQ)
+        if _chan_val(ch) is not None:
+            ts = _cell(row, TS)
+            tss = _cell(row, TSS)
+            size = _cell(row, SIZE)
+            append(f"[RECV] {ch} seq={seq} ts_send={tss} ts={ts} size={size}\n")
             written += 1
-        if dir_ == "RX" and ch == "REL" and act:
-            g.write(f"[EV] {act.upper()} seq={seq}\n")  # deliver/buffer/dup/skip
+        if ch == "REL":
+            act = _cell(row, ACT).lower()
+            if act:
+                append(f"[EV] {act.upper()} seq={seq}\n")  # deliver/buffer/dup/skip
+                written += 1
+        if len(batch) >= _BATCH_LINES:
+            g.writelines(batch)
+            batch.clear()
+    g.writelines(batch)
+    return written
+
+# --- vectorized path (pandas) ---------------------------------------------
+# Whole-column boolean masks and string concatenation instead of a Python
+# loop over DictReader rows; charts-latency.py parses each line on its own,
+# so emitting the line groups back-to-back instead of interleaved in row
+# order does not change the charts.
+
+def _pd_col(df, *names):
+    for n in names:
+        if n in df.columns:
+            return df[n]
+    return _pd.Series("", index=df.index)
+
+def _pd_read(csv_path):
+    # Everything as str with NaN off, so masks see the same values the
+    # row loop would.
+    return _pd.read_csv(csv_path, dtype=str, keep_default_na=False)
+
+def _pd_ack_lines(df):
+    dir_ = _pd_col(df, "dir").str.upper()
+    ch = _pd_col(df, "channel", "chan")
+    seq = _pd_col(df, "seq")
+    rtt = _pd_col(df, "rtt_ms", "rtt")
+    mask = (dir_ == "RX") & (ch == "ACK") & (seq != "") & (rtt != "")
+    rtt = rtt[mask].where(rtt[mask].str.endswith("ms"), rtt[mask] + "ms")
+    return "SeqNo: " + seq[mask] + " ChannelType: 0 RTT: " + rtt
+
+def _run_pandas(csv_path: str, out_path: str, mode: str) -> int:
+    df = _pd_read(csv_path)
+    chunks = []
+    if mode == "sender":
+        dir_ = _pd_col(df, "dir").str.upper()
+        ch = _pd_col(df, "channel", "chan")
+        seq = _pd_col(df, "seq")
+        tx = (dir_ == "TX") & ch.isin(CHAN_MAP)
+        seq_tx = seq[tx].where(seq[tx] != "", "0")
+        chunks.append("SeqNo: " + seq_tx + " ChannelType: "
+                      + ch[tx].map(_CHAN_STR))
+        chunks.append(_pd_ack_lines(df))
+    else:
+        dir_ = _pd_col(df, "dir").str.upper()
+        ch = _pd_col(df, "channel", "chan")
+        seq = _pd_col(df, "seq")
+        ts = _pd_col(df, "ts", "timestamp")
+        tss = _pd_col(df, "ts_send")
+        size = _pd_col(df, "size")
+        act = _pd_col(df, "action", "event").str.lower()
+        recv = (dir_ == "RX") & ch.isin(("REL", "UNREL"))
+        chunks.append("[RECV] " + ch[recv] + " seq=" + seq[recv]
+                      + " ts_send=" + tss[recv] + " ts=" + ts[recv]
+                      + " size=" + size[recv])
+        ev = (dir_ == "RX") & (ch == "REL") & (act != "")
+        chunks.append("[EV] " + act[ev].str.upper() + " seq=" + seq[ev])
+        sender_csv = _maybe_sender_csv(csv_path)
+        if os.path.exists(sender_csv):
+            chunks.append(_pd_ack_lines(_pd_read(sender_csv)))
+    written = 0
+    with open(out_path, "w") as g:
+        for s in chunks:
+            if len(s):
+                g.write("\n".join(s.tolist()))
+                g.write("\n")
+                written += len(s)
+    return written
+
+
+def _emit_ack_lines(r, g) -> int:
+    # ACK-only subset of _emit_sender_lines, for appending RTTs to a
+    # receiver-mode export.
+    header = next(r, None)
+    if header is None:
+        return 0
+    DIR = _col_idx(header, "dir")
+    CH  = _col_idx(header, "channel", "chan")
+    SEQ = _col_idx(header, "seq")
+    RTT = _col_idx(header, "rtt_ms", "rtt")
+    written = 0
+    for row in r:
+        if _cell(row, CH) != "ACK" or _cell(row, DIR).upper() != "RX":
+            continue
+        seq = _cell(row, SEQ)
+        rtt = _cell(row, RTT)
+        if seq and rtt:
+            rtt_str = f"{rtt}ms" if not rtt.endswith("ms") else rtt
+            g.write(f"SeqNo: {seq} ChannelType: 0 RTT: {rtt_str}\n")
             written += 1
     return written
 
 def run(csv_path: str, out_path: str, mode: str) -> int:
+    if _pd is not None:
+        try:
+            return _run_pandas(csv_path, out_path, mode)
+        except Exception:
+            pass  # odd/partial CSV: the row loop below is more tolerant
     written = 0
-    with open(csv_path, newline="") as f, open(out_path, "w") as g:
-        r = csv.DictReader(f)
+    # One writer handle for the whole run: receiver mode used to close
+    # out_path and reopen it in append mode for the ACK lines, paying an
+    # extra open/flush cycle for nothing.
+    with open(csv_path, newline="", buffering=_IO_BUF) as f, \
+         open(out_path, "w", buffering=_IO_BUF) as g:
+        r = csv.reader(f)
         if mode == "sender":
             written = _emit_sender_lines(r, g)
         else:
-            # Primary: receiver-side RX lines + events (no RTT here)
+            # Primary: receiver-side RX lines + events (no RTT here);
+            # then ACK-derived RTTs from sender.csv if available
             written = _emit_receiver_lines(r, g)
-    # For receiver mode, if we didn’t get any RTT lines (expected), also try sender.csv to add ACK RTTs:
-    if mode == "receiver":
-        # Append ACK-derived RTTs from sender.csv if available
-        sender_csv = _maybe_sender_csv(csv_path)
-        try:
-            with open(sender_csv, newline="") as f2, open(out_path, "a") as g2:
-                r2 = csv.DictReader(f2)
-                # Only append ACK lines
-                for row in r2:
-                    dir_ = (_get(row, "dir").upper())
-                    ch   = _get(row, "channel", "chan")
-                    if dir_ == "RX" and ch == "ACK":
-                        seq = _get(row, "seq")
-                        rtt = _get(row, "rtt_ms", "rtt")
-                        if seq and rtt:
-                            rtt_str = f"{rtt}ms" if not str(rtt).endswith("ms") else str(rtt)
-                            g2.write(f"SeqNo: {seq} ChannelType: 0 RTT: {rtt_str}\n")
-                            written += 1
-        except FileNotFoundError:
-            pass
+            sender_csv = _maybe_sender_csv(csv_path)
+            try:
+                with open(sender_csv, newline="", buffering=_IO_BUF) as f2:
+                    written += _emit_ack_lines(csv.reader(f2), g)
+            except FileNotFoundError:
+                pass
     return written
 
 def main():
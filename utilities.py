@@ -1,9 +1,18 @@
+import atexit
 import csv
 import json
+import os
 import random
 import struct
 import time
 
+try:  # optional: C JSON codec, ~10x stdlib for encode; bytes out directly
+    import orjson
+    _json_dumps = orjson.dumps
+except ImportError:
+    def _json_dumps(obj):
+        return json.dumps(obj).encode("utf-8")
+
 
 CSV_FIELDNAMES = ['Channel', 'Packet Number', 'Time Sent', 'Time Received', 'RTT Unreliable', 'Time ACK Received', 'RTT Reliable']
 
@@ -15,22 +24,88 @@ def overwrite_csv_file(file, fieldnames, rows):
 
 
 def write_to_csv_file(file, fieldnames, row):
+    # Legacy per-row helper: reopens the file and rebuilds a DictWriter
+    # for every call. Use CsvLogger for anything written per packet.
     with open(file, 'a', newline='') as csv_file:
         csv_writer = csv.DictWriter(csv_file, fieldnames=fieldnames)
         csv_writer.writerow(row)
         csv_file.flush()
 
+
+class CsvLogger:
+    """One file handle and one csv.writer for the whole run.
+
+    write_to_csv_file pays an open, a DictWriter construction, and a
+    flush per row - three syscalls plus a dict->row translation each
+    time. This keeps the file open in append mode with a large buffer
+    and takes rows positionally (caller supplies values in field order),
+    so the per-row cost is a single writer.writerow call.
+    """
+
+    def __init__(self, path, fieldnames=CSV_FIELDNAMES):
+        try:
+            write_header = os.path.getsize(path) == 0
+        except OSError:
+            write_header = True
+        self._fh = open(path, 'a', newline='', buffering=1 << 16)
+        self._writer = csv.writer(self._fh)
+        if write_header:
+            self._writer.writerow(fieldnames)
+        self.write_row = self._writer.writerow    # bound method, one hop
+        self.write_rows = self._writer.writerows
+        atexit.register(self.close)
+
+    def close(self):
+        if not self._fh.closed:
+            self._fh.flush()
+            self._fh.close()
+
 def make_flags_byte(channel_type, latency):
     # 1-bit channel_type, 1-bit latency; packed in low bits.
     return (latency << 1) | channel_type
 
+# Precomputed decode of every possible flags byte -> (channel_type, latency).
+# One tuple index replaces two mask/shift ops per packet, and the table
+# extends naturally if more flag bits are added.
+FLAG_TABLE = tuple((f & 1, (f >> 1) & 1) for f in range(256))
+
+def unpack_flags_byte(flags):
+    # Inverse of make_flags_byte via the LUT.
+    return FLAG_TABLE[flags & 0xFF]
+
+# Precompiled once; struct.pack with a literal format re-parses the
+# format string on every call.
+_HDR_STRUCT = struct.Struct('!BHI')
+
 def make_custom_header(flags, seq_no, timestamp):
     # flags:1B, seq:2B, ts:4B (big-endian).
-    return struct.pack('!BHI', flags, seq_no, timestamp)
+    return _HDR_STRUCT.pack(flags, seq_no, timestamp)
 
 def make_payload(custom_header, mock_game_data):
     return custom_header + mock_game_data
 
+def build_packet(channel_type, latency, seq_no, timestamp, game_data):
+    # Fused make_flags_byte + make_custom_header + make_payload: one
+    # call boundary and one bytes allocation instead of three calls and
+    # an extra header-copy concatenation.
+    return _HDR_STRUCT.pack((latency << 1) | channel_type, seq_no, timestamp) + game_data
+
+# Wire format for mock game data: i (uint32), ts_ms (uint32), x, y
+# (float32). 16 bytes on the wire versus ~60 for the JSON equivalent,
+# and pack/unpack is one C call instead of a JSON state machine.
+MOCK_STRUCT = struct.Struct('!IIff')
+
 def make_mock_game_data(i):
-    obj = {"i": i, "ts": (int(time.time()*1000) % (2**32)), "x": random.random(), "y": random.random()}
-    return json.dumps(obj).encode("utf-8")
+    # time_ns keeps the whole timestamp in integers: no float multiply,
+    # no float->int conversion, and & is cheaper than % for the wrap.
+    return MOCK_STRUCT.pack(
+        i & 0xFFFFFFFF,
+        (time.time_ns() // 1_000_000) & 0xFFFFFFFF,
+        random.random(),
+        random.random(),
+    )
+
+def make_mock_game_data_json(i):
+    # Legacy JSON payload, kept for interop with older receivers.
+    obj = {"i": i, "ts": (time.time_ns() // 1_000_000) & 0xFFFFFFFF, "x": random.random(), "y": random.random()}
+    return _json_dumps(obj)